@@ -0,0 +1,180 @@
+#!/usr/bin/env python3.11
+"""
+Incremental JSON Scanning
+Picks complete items out of a JSON document while it is still streaming in,
+and JSON objects out of free-form text, scanning each character once
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+import msgspec
+
+# Characters that change scanner state outside and inside strings
+OUTSIDE_STRING_RE = re.compile(r'[{}\[\]":,]')
+INSIDE_STRING_RE = re.compile(r'["\\]')
+OBJECT_START_RE = re.compile(r'\{')
+OBJECT_RE = re.compile(r'[{}"]')
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """
+    Yield each outermost balanced {...} span in free-form text
+
+    One pass over the text, tracking string and escape state so braces
+    inside string values do not count
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    pos = 0
+
+    while True:
+        if in_string:
+            pattern = INSIDE_STRING_RE
+        else:
+            pattern = OBJECT_RE if depth else OBJECT_START_RE
+        match = pattern.search(text, pos)
+        if not match:
+            return
+
+        pos = match.start()
+        char = match.group()
+
+        if in_string:
+            if char == '\\':
+                pos += 2
+                continue
+            in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            if not depth:
+                start = pos
+            depth += 1
+        else:
+            depth -= 1
+            if not depth:
+                yield text[start:pos + 1]
+
+        pos += 1
+
+
+class IncrementalCaseParser:
+    """
+    Stateful scanner over a streamed {"cases": [...], ...} document
+
+    Each object in the array under array_key is decoded as soon as its
+    closing brace arrives. Top-level string fields are collected in fields.
+    Only the unfinished tail of the document is kept in the scan buffer, so
+    the cost of a feed does not grow with the text already scanned.
+    """
+
+    def __init__(self, array_key: str = 'cases'):
+        self.array_key = array_key
+        self.cases: List[Dict] = []
+        self.fields: Dict[str, Any] = {}
+        self._chunks: List[str] = []
+        self._buffer = ''
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._string_start = 0
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Scan the next piece of the document, returning newly completed cases"""
+        self._chunks.append(chunk)
+        self._buffer += chunk
+        text = self._buffer
+        pos = self._pos
+        new_cases = []
+
+        while True:
+            pattern = INSIDE_STRING_RE if self._in_string else OUTSIDE_STRING_RE
+            match = pattern.search(text, pos)
+            if not match:
+                # pos may already be past the end when an escape was split across chunks
+                pos = max(pos, len(text))
+                break
+
+            pos = match.start()
+            char = match.group()
+
+            if self._in_string:
+                if char == '\\':
+                    # Skip the escaped character, even if it has not arrived yet
+                    pos += 2
+                    continue
+                self._in_string = False
+                if len(self._stack) == 1:
+                    self._top_level_string(text[self._string_start:pos + 1])
+            elif char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ':':
+                self._expect_value = len(self._stack) == 1
+            elif char == ',':
+                self._expect_value = False
+            elif char in '{[':
+                self._stack.append(char)
+                if len(self._stack) == 2 and char == '[':
+                    self._in_array = self._key == self.array_key
+                elif len(self._stack) == 3 and char == '{' and self._in_array:
+                    self._item_start = pos
+            else:
+                if self._stack:
+                    self._stack.pop()
+                if char == '}' and len(self._stack) == 2 and self._item_start is not None:
+                    case = self._decode(text[self._item_start:pos + 1])
+                    self._item_start = None
+                    if isinstance(case, dict):
+                        self.cases.append(case)
+                        new_cases.append(case)
+                elif char == ']' and len(self._stack) == 1:
+                    self._in_array = False
+
+            pos += 1
+
+        self._trim(pos)
+        return new_cases
+
+    def _trim(self, pos: int):
+        # Drop scanned text that no unfinished case or string still points into
+        keep = min(pos, len(self._buffer))
+        if self._item_start is not None:
+            keep = min(keep, self._item_start)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+
+        self._buffer = self._buffer[keep:]
+        self._pos = pos - keep
+        self._string_start -= keep
+        if self._item_start is not None:
+            self._item_start -= keep
+
+    def _top_level_string(self, literal: str):
+        value = self._decode(literal)
+        if self._expect_value:
+            if self._key is not None:
+                self.fields[self._key] = value
+            self._expect_value = False
+        else:
+            self._key = value
+
+    @staticmethod
+    def _decode(literal: str) -> Any:
+        try:
+            return msgspec.json.decode(literal)
+        except msgspec.DecodeError:
+            return None
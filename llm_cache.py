@@ -0,0 +1,305 @@
+#!/usr/bin/env python3.11
+"""
+LLM Response Cache
+Exact and semantic caching of research results so repeated instructions
+do not pay for another round of LLM calls
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Protocol, Tuple
+
+import msgspec
+import numpy as np
+
+
+class CacheBackend(Protocol):
+    """Storage for cached responses, keyed by the exact-match cache key"""
+
+    def get(self, key: str) -> Optional[Dict]:
+        ...
+
+    def set(self, key: str, value: Dict) -> None:
+        ...
+
+
+class InMemoryBackend:
+    """Process-local cache storage"""
+
+    def __init__(self):
+        self._store: Dict[str, Dict] = {}
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._store.get(key)
+
+    def set(self, key: str, value: Dict) -> None:
+        self._store[key] = value
+
+
+class FileBackend:
+    """Cache storage with one JSON file per key, shared across runs"""
+
+    def __init__(self, directory: str = '.llm_cache'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'rb') as cache_file:
+                return msgspec.json.decode(cache_file.read())
+        except (OSError, msgspec.DecodeError):
+            return None
+
+    def set(self, key: str, value: Dict) -> None:
+        with open(self._path(key), 'wb') as cache_file:
+            cache_file.write(msgspec.json.encode(value))
+
+
+class LLMCache:
+    """
+    Two-tier response cache
+
+    The exact tier looks results up by a SHA-256 key over all request
+    parameters. The semantic tier compares the instruction embedding with
+    those of earlier requests; a close match is only reused after verifying
+    its context: category, date range, model and requested case count must
+    match exactly, and the embedding of the combined "category|date_range|instruction" string must
+    clear a stricter threshold.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None,
+                 similarity_threshold: float = 0.92,
+                 context_threshold: float = 0.95):
+        self.backend = backend or InMemoryBackend()
+        self.similarity_threshold = similarity_threshold
+        self.context_threshold = context_threshold
+        # Queue workers share one cache; the index lists and matrices change together
+        self._lock = threading.RLock()
+        self._keys: List[str] = []
+        self._contexts: List[Tuple[str, str, str, int]] = []
+        self._embeddings: Optional[np.ndarray] = None
+        self._context_embeddings: Optional[np.ndarray] = None
+
+    @staticmethod
+    def make_key(**params) -> str:
+        """Build the exact-match key for a set of request parameters"""
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def context_string(instruction: str, category: str, date_range: str) -> str:
+        """Text embedded for the context verification pass"""
+        return f"{category}|{date_range}|{instruction}"
+
+    @staticmethod
+    def _normalize_context(category: str, date_range: str, model: str = "",
+                           max_results: int = 0) -> Tuple[str, str, str, int]:
+        return (
+            " ".join(category.lower().split()),
+            " ".join(date_range.lower().split()),
+            model,
+            int(max_results)
+        )
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _append_row(matrix: Optional[np.ndarray], row: np.ndarray) -> np.ndarray:
+        row = row[np.newaxis, :]
+        return row if matrix is None else np.vstack([matrix, row])
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Exact-match lookup"""
+        return self.backend.get(key)
+
+    def get_similar(self, embedding, category: str, date_range: str,
+                    context_embedding, model: str = "",
+                    max_results: int = 0) -> Optional[Tuple[Dict, float]]:
+        """Return the most similar cached result that passes context verification"""
+        with self._lock:
+            if self._embeddings is None or not self._keys:
+                return None
+
+            # Rows are normalized on insert, so cosine similarity is a dot product
+            similarities = self._embeddings @ self._normalize(embedding)
+            context = self._normalize_context(category, date_range, model, max_results)
+            context_vector = self._normalize(context_embedding)
+
+            for idx in np.argsort(-similarities):
+                similarity = float(similarities[idx])
+                if similarity < self.similarity_threshold:
+                    break
+
+                # Similar wording about a different category, period, model or size is a miss
+                if self._contexts[idx] != context:
+                    continue
+                if float(self._context_embeddings[idx] @ context_vector) < self.context_threshold:
+                    continue
+
+                value = self.get(self._keys[idx])
+                if value is not None:
+                    return value, similarity
+
+            return None
+
+    def set(self, key: str, value: Dict, embedding=None, category: str = "",
+            date_range: str = "", context_embedding=None, model: str = "",
+            max_results: int = 0) -> None:
+        """Store a result, and index its embeddings for semantic lookups"""
+        with self._lock:
+            self.backend.set(key, value)
+
+            if embedding is None or context_embedding is None:
+                return
+
+            self._embeddings = self._append_row(self._embeddings, self._normalize(embedding))
+            self._context_embeddings = self._append_row(
+                self._context_embeddings, self._normalize(context_embedding)
+            )
+            self._contexts.append(self._normalize_context(category, date_range, model, max_results))
+            self._keys.append(key)
+
+
+class PersistentLLMCache(LLMCache):
+    """
+    LLMCache whose semantic index survives restarts
+
+    Responses and their metadata live in SQLite. Normalized embeddings are
+    appended to flat float32 files that are memory-mapped on start-up, so
+    loading the index does not read the vectors and lookups run as a
+    single matmul over the mapped pages.
+    """
+
+    def __init__(self, directory: str = '.llm_cache', dimensions: int = 1536,
+                 similarity_threshold: float = 0.92,
+                 context_threshold: float = 0.95):
+        super().__init__(similarity_threshold=similarity_threshold,
+                         context_threshold=context_threshold)
+        self.dimensions = dimensions
+        os.makedirs(directory, exist_ok=True)
+
+        self._row_bytes = dimensions * np.dtype(np.float32).itemsize
+        self._embeddings_path = os.path.join(directory, 'embeddings.f32')
+        self._context_embeddings_path = os.path.join(directory, 'context_embeddings.f32')
+        for path in (self._embeddings_path, self._context_embeddings_path):
+            open(path, 'ab').close()
+
+        # Used from several worker threads, always under self._lock
+        self._conn = sqlite3.connect(os.path.join(directory, 'cache.sqlite'), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                category TEXT NOT NULL,
+                date_range TEXT NOT NULL,
+                model TEXT NOT NULL DEFAULT '',
+                max_results INTEGER NOT NULL DEFAULT 0,
+                response_json BLOB NOT NULL,
+                row INTEGER
+            )
+        """)
+        # Caches created before model and max_results were part of the context
+        columns = {column[1] for column in self._conn.execute("PRAGMA table_info(entries)")}
+        if 'model' not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN model TEXT NOT NULL DEFAULT ''")
+        if 'max_results' not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN max_results INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self._load_index()
+
+    def _file_rows(self) -> int:
+        # A crash between the two appends can leave one file a row longer
+        return min(
+            os.path.getsize(self._embeddings_path),
+            os.path.getsize(self._context_embeddings_path)
+        ) // self._row_bytes
+
+    def _map(self, path: str, rows: int) -> Optional[np.ndarray]:
+        if not rows:
+            return None
+        return np.memmap(path, dtype=np.float32, mode='r', shape=(rows, self.dimensions))
+
+    def _load_index(self):
+        rows = self._file_rows()
+        # Rows written without a committed entry stay None and never match
+        self._keys = [None] * rows
+        self._contexts = [None] * rows
+        for row, key, *context in self._conn.execute(
+            "SELECT row, key, category, date_range, model, max_results "
+            "FROM entries WHERE row IS NOT NULL"
+        ):
+            if row < rows:
+                self._keys[row] = key
+                self._contexts[row] = tuple(context)
+
+        self._embeddings = self._map(self._embeddings_path, rows)
+        self._context_embeddings = self._map(self._context_embeddings_path, rows)
+
+    def _write_row(self, path: str, row: int, vector: np.ndarray):
+        with open(path, 'r+b') as embeddings_file:
+            embeddings_file.seek(row * self._row_bytes)
+            embeddings_file.write(vector.tobytes())
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Exact-match lookup"""
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT response_json FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            return msgspec.json.decode(found[0]) if found else None
+
+    def set(self, key: str, value: Dict, embedding=None, category: str = "",
+            date_range: str = "", context_embedding=None, model: str = "",
+            max_results: int = 0) -> None:
+        """Store a result, and append its embeddings to the semantic index"""
+        with self._lock:
+            context = self._normalize_context(category, date_range, model, max_results)
+            vectors = None
+            if embedding is not None and context_embedding is not None:
+                vectors = (self._normalize(embedding), self._normalize(context_embedding))
+                if any(vector.shape != (self.dimensions,) for vector in vectors):
+                    print(f"⚠️  Embedding size does not match the {self.dimensions}-dimension cache index, not indexing")
+                    vectors = None
+
+            row = None
+            with self._conn:
+                if vectors is not None:
+                    row = self._file_rows()
+                    self._write_row(self._embeddings_path, row, vectors[0])
+                    self._write_row(self._context_embeddings_path, row, vectors[1])
+
+                self._conn.execute(
+                    """
+                    INSERT INTO entries (key, category, date_range, model, max_results, response_json, row)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        category = excluded.category,
+                        date_range = excluded.date_range,
+                        model = excluded.model,
+                        max_results = excluded.max_results,
+                        response_json = excluded.response_json,
+                        row = COALESCE(excluded.row, entries.row)
+                    """,
+                    (key, *context, msgspec.json.encode(value), row)
+                )
+
+            if row is None:
+                return
+
+            padding = row + 1 - len(self._keys)
+            self._keys.extend([None] * padding)
+            self._contexts.extend([None] * padding)
+            self._keys[row] = key
+            self._contexts[row] = context
+            self._embeddings = self._map(self._embeddings_path, row + 1)
+            self._context_embeddings = self._map(self._context_embeddings_path, row + 1)
@@ -8,16 +8,23 @@ import os
 import sys
 import time
 import re
+import json
+import asyncio
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 
+import google_auth_httplib2
+import orjson
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+from googleapiclient.http import HttpRequest, MediaIoBaseUpload, build_http
 import io
+import itertools
+import concurrent.futures
 
 # Configuration
 SCOPES = [
@@ -34,7 +41,114 @@ TRACKING_SHEET_ID = '1tC72KFZJ4mi6o2bb2tEF4SGmFMtDzfcghRjIHa8X-3g'
 # Processing configuration
 MAX_RETRIES = 3
 PROCESSING_TIMEOUT_MINUTES = 10
+# Oldest pending files taken per run, and how many of them are processed at once
+MAX_FILES_PER_RUN = 4
+MAX_CONCURRENT_FILES = 2
 TEST_MODE = False
+# Research at temperature 0 and reuse cached results for repeated instructions
+# (set LLM_CACHE_DIR to keep the cache across runs)
+DETERMINISTIC_RESEARCH = False
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Tracking sheet column mapping (adjust based on your actual sheet structure)
+COLUMN_MAP = {
+    'status': 'B',
+    'manus_started': 'C',
+    'manus_completed': 'D',
+    'result_doc_id': 'E',
+    'result_folder': 'F',
+    'cases_found': 'G',
+    'processing_time_ms': 'H',
+    'error_message': 'I',
+    'retry_count': 'J',
+    'last_error_time': 'K'
+}
+
+# Local queue scan state: createdTime watermark of the last processed file,
+# Drive Changes page token, and whether the last folder listing came back empty.
+# Kept outside the checkout, since scheduled runs re-clone the repository
+QUEUE_STATE_FILE = os.environ.get(
+    'QUEUE_STATE_FILE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'manus-content-pipeline', 'queue_state.json')
+)
+
+# Instruction file parsing: header/parameter fields are matched in a single pass,
+# the multi-line INSTRUCTION block separately. The lookahead makes each match
+# zero-width, so a field is found anywhere and a value may start on the next
+# line, as with a separate re.search per field
+INSTR_RE = re.compile(
+    r'(?=(?P<key>INSTRUCTION_ID|CATEGORY_ID|CATEGORY|PRIORITY|date_range|max_results|filename_prefix)'
+    r':\s*(?P<val>.+))',
+    re.IGNORECASE
+)
+MAX_RESULTS_RE = re.compile(r'\d+')
+INSTRUCTION_BLOCK_RE = re.compile(
+    r'INSTRUCTION:\s*\n(.*?)(?=\n[A-Z_]+:|\Z)',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Values for instruction fields missing from the file
+INSTRUCTION_DEFAULTS = {
+    'instruction_id': '',
+    'category': '',
+    'category_id': '',
+    'priority': 'Normal',
+    'max_results': 10,
+    'filename_prefix': 'RESEARCH_'
+}
+
+# Numeric instruction ID suffix, used as a tracking sheet row hint
+ROW_HINT_RE = re.compile(r'(\d+)\s*$')
+
+# Research report layout, filled in by format_research_report
+REPORT_HEADER_TEMPLATE = """# RESEARCH REPORT
+# ===============
+# Generated by: Manus Research Engine
+# Instruction ID: {instruction_id}
+# Category: {category}
+# Generated: {timestamp}
+# Processing Time: {duration}
+# Cases Found: {total_cases}
+
+## Introduction
+
+This report presents the findings for the research instruction: "{research_query}". 
+
+The research was conducted using Manus's iterative AI-powered process, which includes strategic query planning, comprehensive web investigation, content validation, and professional synthesis to ensure the quality and relevance of each case.
+
+---
+
+## Case Studies
+
+"""
+
+REPORT_CASE_TEMPLATE = """### {idx}. {title}
+
+**Date:** {date}  
+**Source:** {source}
+
+**Description:**
+
+{description}
+
+**Why It Qualifies:**
+
+> {why_qualifies}
+
+**Key Points:**
+"""
+
+REPORT_NO_CASES = "### No Cases Found\n\nThe research process did not identify any cases that met the specified criteria after comprehensive search and validation.\n\n"
+
+REPORT_FOOTER_TEMPLATE = """## Research Methodology
+
+{methodology}
+
+**Processing Details:**
+- Processing Time: {processing_time:.1f} seconds
+- Research Timestamp: {research_timestamp}
+- Instruction File: {filename}
+"""
 
 class ManusAutomation:
     """Main automation class for processing research instructions"""
@@ -43,20 +157,31 @@ class ManusAutomation:
         self.drive_service = None
         self.sheets_service = None
         self.docs_service = None
-        self.start_time = None
+        self._credentials = None
+        self._http_local = threading.local()
+        self._row_cache: Dict[str, int] = {}
+        self._pending_sheet_writes: Dict[str, Dict[str, Any]] = {}
+        self._sheet_writes_lock = threading.Lock()
+        self._queue_state: Dict[str, Any] = {}
+        self._moved_file_ids: set = set()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=2 * MAX_CONCURRENT_FILES)
         
     def authenticate(self):
         """Authenticate with Google APIs"""
         print("🔐 Authenticating with Google...")
         creds = None
+        token_dirty = False
         
         # Load existing token
         if os.path.exists('token.json'):
             creds = Credentials.from_authorized_user_file('token.json', SCOPES)
         
-        # Refresh or get new credentials
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
+        # Refresh or get new credentials; a stored token with more than
+        # TOKEN_REFRESH_MARGIN left is reused without contacting Google.
+        # Refresh early only when a refresh token allows it: a still-valid
+        # token is better than a consent flow that cannot finish headless
+        if not creds or not creds.valid or (creds.refresh_token and self._token_expiring(creds)):
+            if creds and creds.refresh_token:
                 print("♻️  Refreshing expired token...")
                 creds.refresh(Request())
             else:
@@ -94,33 +219,200 @@ class ManusAutomation:
                 flow.fetch_token(authorization_response=code)
                 creds = flow.credentials
             
-            # Save credentials
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
+            token_dirty = True
+        
+        # Save credentials only when they changed
+        if token_dirty:
+            self._save_token(creds)
         
-        # Build services
-        self.drive_service = build('drive', 'v3', credentials=creds)
-        self.sheets_service = build('sheets', 'v4', credentials=creds)
-        self.docs_service = build('docs', 'v1', credentials=creds)
+        # Build services on one shared authorized connection per thread
+        self._credentials = creds
+        self.drive_service = self._build_service('drive', 'v3')
+        self.sheets_service = self._build_service('sheets', 'v4')
+        self.docs_service = self._build_service('docs', 'v1')
         
         print("✅ Authentication successful")
+    
+    def _authorized_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        """Return this thread's authorized connection, shared by all services"""
+        # httplib2 connections are not thread-safe, so background threads get their own
+        http = getattr(self._http_local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self._credentials, http=build_http())
+            self._http_local.http = http
+        return http
+    
+    def _build_request(self, http, *args, **kwargs) -> HttpRequest:
+        """Bind each API request to the calling thread's connection"""
+        return HttpRequest(self._authorized_http(), *args, **kwargs)
+    
+    def _build_service(self, service_name: str, version: str):
+        """Build an API client that reuses the shared authorized connection"""
+        return build(
+            service_name,
+            version,
+            http=self._authorized_http(),
+            requestBuilder=self._build_request,
+            # Use the discovery documents bundled with the client library
+            # instead of fetching them from googleapis.com on every run
+            static_discovery=True,
+            cache_discovery=False
+        )
+    
+    @staticmethod
+    def _save_token(creds: Credentials):
+        """Write credentials to token.json in the authorized-user format"""
+        token_info = {
+            'token': creds.token,
+            'refresh_token': creds.refresh_token,
+            'token_uri': creds.token_uri,
+            'client_id': creds.client_id,
+            'client_secret': creds.client_secret,
+            'scopes': creds.scopes
+        }
+        if creds.expiry:
+            # Same layout as Credentials.to_json(); needed for _token_expiring on reload
+            token_info['expiry'] = creds.expiry.isoformat() + 'Z'
         
-    def list_pending_files(self) -> List[Dict]:
-        """List all files in Pending folder, sorted by creation time (oldest first)"""
+        with open('token.json', 'wb') as token:
+            token.write(orjson.dumps(token_info))
+    
+    @staticmethod
+    def _token_expiring(creds: Credentials) -> bool:
+        """Check whether the access token expires within TOKEN_REFRESH_MARGIN"""
+        if not creds.expiry:
+            return False
+        # google-auth stores expiry as naive UTC
+        return creds.expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN
+        
+    def _load_queue_state(self):
+        """Load the queue scan state saved by previous runs"""
+        self._queue_state = {}
+        if os.path.exists(QUEUE_STATE_FILE):
+            try:
+                with open(QUEUE_STATE_FILE, 'r') as state_file:
+                    self._queue_state = json.load(state_file)
+            except (OSError, ValueError) as error:
+                print(f"⚠️  Ignoring unreadable queue state: {error}")
+    
+    def _save_queue_state(self):
+        """Persist the queue scan state for the next run"""
         try:
-            query = f"'{PENDING_FOLDER_ID}' in parents and trashed=false"
+            os.makedirs(os.path.dirname(os.path.abspath(QUEUE_STATE_FILE)), exist_ok=True)
+            with open(QUEUE_STATE_FILE, 'w') as state_file:
+                json.dump(self._queue_state, state_file)
+        except OSError as error:
+            print(f"⚠️  Could not save queue state: {error}")
+    
+    def _advance_watermark(self, created_time: Optional[str]):
+        """Record the createdTime of a file that has left the Pending folder"""
+        # Drive RFC 3339 timestamps share one format, so they compare as strings
+        if created_time and created_time > self._queue_state.get('watermark', ''):
+            self._queue_state['watermark'] = created_time
+            self._save_queue_state()
+    
+    def _advance_watermark_past(self, files: List[Dict]):
+        """Advance the watermark over the oldest files of a batch that have been moved"""
+        # A file still in Pending (e.g. waiting for a retry) must stay above the
+        # watermark, even if newer files of the same batch were moved
+        for file_info in files:
+            if file_info['id'] not in self._moved_file_ids:
+                break
+            self._advance_watermark(file_info.get('createdTime'))
+    
+    def _iter_pending(self, page_size: int = 1):
+        """Yield files in the Pending folder oldest first, fetching pages lazily"""
+        query = f"'{PENDING_FOLDER_ID}' in parents and trashed=false"
+        
+        if TEST_MODE:
+            query += " and name contains 'TEST_'"
+        
+        # Files are processed oldest first, so nothing older than the last
+        # processed file can still be pending
+        watermark = self._queue_state.get('watermark')
+        if watermark:
+            query += f" and createdTime >= '{watermark}'"
+        
+        files_resource = self.drive_service.files()
+        request = files_resource.list(
+            q=query,
+            orderBy='createdTime',
+            fields='nextPageToken, files(id, name, createdTime, mimeType)',
+            pageSize=page_size
+        )
+        
+        while request is not None:
+            response = request.execute()
+            yield from response.get('files', [])
+            request = files_resource.list_next(request, response)
+    
+    def _pending_changes(self) -> Optional[List[Dict]]:
+        """
+        Return files that entered or changed in the Pending folder since the
+        last run, using the Drive Changes API. Returns None when no page token
+        is stored yet, in which case the folder has to be listed in full.
+        """
+        changes_resource = self.drive_service.changes()
+        page_token = self._queue_state.get('page_token')
+        
+        if not page_token:
+            response = changes_resource.getStartPageToken().execute()
+            self._queue_state['page_token'] = response['startPageToken']
+            return None
+        
+        changed = []
+        while page_token:
+            response = changes_resource.list(
+                pageToken=page_token,
+                spaces='drive',
+                pageSize=1000,
+                fields='nextPageToken, newStartPageToken, '
+                       'changes(removed, file(id, name, parents, createdTime, mimeType, trashed))'
+            ).execute()
             
-            if TEST_MODE:
-                query += " and name contains 'TEST_'"
+            for change in response.get('changes', []):
+                file = change.get('file')
+                if change.get('removed') or not file or file.get('trashed'):
+                    continue
+                if TEST_MODE and 'TEST_' not in file.get('name', ''):
+                    continue
+                if PENDING_FOLDER_ID in file.get('parents', []):
+                    changed.append(file)
             
-            results = self.drive_service.files().list(
-                q=query,
-                orderBy='createdTime',
-                fields='files(id, name, createdTime, mimeType)',
-                pageSize=100
-            ).execute()
+            if 'newStartPageToken' in response:
+                self._queue_state['page_token'] = response['newStartPageToken']
+            page_token = response.get('nextPageToken')
+        
+        return changed
+    
+    def list_pending_files(self, max_files: int = 1) -> List[Dict]:
+        """List up to max_files files in Pending folder, sorted by creation time (oldest first)"""
+        try:
+            # Tier 1: Drive changes since the last run
+            try:
+                changed = self._pending_changes()
+            except HttpError as error:
+                print(f"⚠️  Could not read Drive changes, listing folder: {error}")
+                changed = None
+            
+            if changed is not None:
+                watermark = self._queue_state.get('watermark', '')
+                if any(file.get('createdTime', '') < watermark for file in changed):
+                    # Moved in with an older createdTime than the watermark
+                    self._queue_state.pop('watermark', None)
+                
+                if changed:
+                    self._queue_state['drained'] = False
+                elif self._queue_state.get('drained'):
+                    self._save_queue_state()
+                    print("📁 No changes in Pending folder since last run")
+                    return []
+            
+            # Tier 2: list the folder (above the watermark)
+            files = list(itertools.islice(self._iter_pending(page_size=max_files), max_files))
+            self._queue_state['drained'] = not files
+            self._save_queue_state()
             
-            files = results.get('files', [])
             print(f"📁 Found {len(files)} pending instruction file(s)")
             return files
             
@@ -131,21 +423,15 @@ class ManusAutomation:
     def read_google_doc(self, file_id: str) -> str:
         """Read content from a Google Doc"""
         try:
-            # Export as plain text
-            request = self.drive_service.files().export_media(
+            # Export as plain text; instruction docs are small, so fetch in one request
+            content_bytes = self.drive_service.files().export(
                 fileId=file_id,
                 mimeType='text/plain'
-            )
-            
-            file_content = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_content, request)
-            
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
+            ).execute()
             
-            content = file_content.getvalue().decode('utf-8')
-            return content
+            if isinstance(content_bytes, str):
+                return content_bytes
+            return content_bytes.decode('utf-8', errors='replace')
             
         except HttpError as error:
             print(f"❌ Error reading document: {error}")
@@ -153,78 +439,107 @@ class ManusAutomation:
     
     def parse_instruction_file(self, content: str, filename: str) -> Dict:
         """Parse instruction file content into structured data"""
+        # Single pass over the header/parameter fields; first occurrence wins
+        fields = {}
+        for match in INSTR_RE.finditer(content):
+            key = match.group('key').lower()
+            value = match.group('val').strip()
+            if key == 'max_results':
+                # Only a value starting with a number counts; otherwise the default
+                number = MAX_RESULTS_RE.match(value)
+                if not number:
+                    continue
+                value = int(number.group())
+            fields.setdefault(key, value)
+        
+        for field, default in INSTRUCTION_DEFAULTS.items():
+            fields.setdefault(field, default)
+        
         instruction = {
-            'instruction_id': '',
-            'category': '',
-            'category_id': '',
-            'priority': 'Normal',
+            'instruction_id': fields['instruction_id'],
+            'category': fields['category'],
+            'category_id': fields['category_id'],
+            'priority': fields['priority'],
             'instruction_text': '',
-            'search_parameters': {},
-            'output_config': {},
+            'search_parameters': {'max_results': fields['max_results']},
+            'output_config': {'filename_prefix': fields['filename_prefix']},
             'filename': filename
         }
         
-        # Extract INSTRUCTION_ID
-        match = re.search(r'INSTRUCTION_ID:\s*(.+)', content, re.IGNORECASE)
-        if match:
-            instruction['instruction_id'] = match.group(1).strip()
-        
-        # Extract CATEGORY
-        match = re.search(r'CATEGORY:\s*(.+)', content, re.IGNORECASE)
-        if match:
-            instruction['category'] = match.group(1).strip()
-        
-        # Extract CATEGORY_ID
-        match = re.search(r'CATEGORY_ID:\s*(.+)', content, re.IGNORECASE)
-        if match:
-            instruction['category_id'] = match.group(1).strip()
-        
-        # Extract PRIORITY
-        match = re.search(r'PRIORITY:\s*(.+)', content, re.IGNORECASE)
-        if match:
-            instruction['priority'] = match.group(1).strip()
-        
         # Extract INSTRUCTION (multi-line)
-        match = re.search(r'INSTRUCTION:\s*\n(.*?)(?=\n[A-Z_]+:|$)', content, re.IGNORECASE | re.DOTALL)
+        match = INSTRUCTION_BLOCK_RE.search(content)
         if match:
             instruction['instruction_text'] = match.group(1).strip()
         
-        # Extract search parameters
-        match = re.search(r'date_range:\s*(.+)', content, re.IGNORECASE)
-        if match:
-            instruction['search_parameters']['date_range'] = match.group(1).strip()
+        if 'date_range' in fields:
+            instruction['search_parameters']['date_range'] = fields['date_range']
         
-        match = re.search(r'max_results:\s*(\d+)', content, re.IGNORECASE)
-        if match:
-            instruction['search_parameters']['max_results'] = int(match.group(1))
-        else:
-            instruction['search_parameters']['max_results'] = 10
+        return instruction
+    
+    def _load_row_cache(self):
+        """Read the Instruction_ID column once and index it by instruction ID"""
+        result = self.sheets_service.spreadsheets().values().get(
+            spreadsheetId=TRACKING_SHEET_ID,
+            range='Manus_Queue!A:A'
+        ).execute()
+        
+        values = result.get('values', [])
+        
+        # Sheets are 1-indexed; keep the first row for duplicated IDs.
+        # Built aside so concurrent lookups never see a half-filled cache
+        row_cache = {}
+        for idx, row in enumerate(values):
+            if row:
+                row_cache.setdefault(row[0], idx + 1)
+        self._row_cache = row_cache
+    
+    def _row_hint_from_id(self, instruction_id: str) -> Optional[int]:
+        """Guess the sheet row from a numeric ID suffix (e.g. INSTR_042 -> 42)"""
+        match = ROW_HINT_RE.search(instruction_id)
+        if not match:
+            return None
         
-        # Extract output config
-        match = re.search(r'filename_prefix:\s*(.+)', content, re.IGNORECASE)
-        if match:
-            instruction['output_config']['filename_prefix'] = match.group(1).strip()
-        else:
-            instruction['output_config']['filename_prefix'] = 'RESEARCH_'
+        row_number = int(match.group(1))
+        return row_number if row_number > 0 else None
+    
+    def _verify_row_hint(self, instruction_id: str, row_number: int) -> Optional[int]:
+        """
+        Check the hinted row and the one below it (for a header row) in one read
         
-        return instruction
+        For a duplicated ID the hinted copy is taken; IDs already indexed by
+        a full scan are answered from the cache and keep their first row.
+        """
+        result = self.sheets_service.spreadsheets().values().get(
+            spreadsheetId=TRACKING_SHEET_ID,
+            range=f'Manus_Queue!A{row_number}:A{row_number + 1}'
+        ).execute()
+        
+        for offset, row in enumerate(result.get('values', [])):
+            if row and row[0] == instruction_id:
+                self._row_cache[instruction_id] = row_number + offset
+                return row_number + offset
+        return None
     
     def find_instruction_row(self, instruction_id: str) -> Optional[int]:
         """Find the row number for a given instruction ID in the tracking sheet"""
+        if instruction_id in self._row_cache:
+            return self._row_cache[instruction_id]
+        
+        # A two-cell read is far cheaper than the whole column
+        row_hint = self._row_hint_from_id(instruction_id)
+        if row_hint is not None:
+            try:
+                row_number = self._verify_row_hint(instruction_id, row_hint)
+                if row_number is not None:
+                    return row_number
+            except HttpError:
+                # e.g. the hint lies beyond the sheet's grid
+                pass
+        
         try:
-            # Read the Instruction_ID column
-            result = self.sheets_service.spreadsheets().values().get(
-                spreadsheetId=TRACKING_SHEET_ID,
-                range='Manus_Queue!A:A'
-            ).execute()
-            
-            values = result.get('values', [])
-            
-            for idx, row in enumerate(values):
-                if row and row[0] == instruction_id:
-                    return idx + 1  # Sheets are 1-indexed
-            
-            return None
+            # Cache miss: the sheet may have gained rows since the last read
+            self._load_row_cache()
+            return self._row_cache.get(instruction_id)
             
         except HttpError as error:
             print(f"❌ Error finding instruction row: {error}")
@@ -239,31 +554,28 @@ class ManusAutomation:
                 print(f"⚠️  Instruction ID {instruction_id} not found in tracking sheet")
                 return False
             
-            # Column mapping (adjust based on your actual sheet structure)
-            column_map = {
-                'status': 'B',
-                'manus_started': 'C',
-                'manus_completed': 'D',
-                'result_doc_id': 'E',
-                'result_folder': 'F',
-                'cases_found': 'G',
-                'processing_time_ms': 'H',
-                'error_message': 'I',
-                'retry_count': 'J',
-                'last_error_time': 'K'
-            }
-            
-            # Prepare batch update
+            # Resolve the target cell for each known field
             data = []
             for field, value in updates.items():
-                if field.lower() in column_map:
-                    col = column_map[field.lower()]
-                    range_name = f'Manus_Queue!{col}{row_number}'
+                col = COLUMN_MAP.get(field.lower())
+                if col:
                     data.append({
-                        'range': range_name,
+                        'range': f'Manus_Queue!{col}{row_number}',
                         'values': [[value]]
                     })
             
+            if len(data) == 1:
+                # A single cell does not need the batchUpdate envelope
+                self.sheets_service.spreadsheets().values().update(
+                    spreadsheetId=TRACKING_SHEET_ID,
+                    range=data[0]['range'],
+                    valueInputOption='USER_ENTERED',
+                    body={'values': data[0]['values']}
+                ).execute()
+                
+                print(f"✅ Updated tracking sheet for {instruction_id}")
+                return True
+            
             if data:
                 body = {'valueInputOption': 'USER_ENTERED', 'data': data}
                 self.sheets_service.spreadsheets().values().batchUpdate(
@@ -280,6 +592,40 @@ class ManusAutomation:
             print(f"❌ Error updating tracking sheet: {error}")
             return False
     
+    def _queue_sheet_update(self, instruction_id: str, updates: Dict[str, Any]):
+        """Queue tracking sheet updates; later values for a field replace earlier ones"""
+        with self._sheet_writes_lock:
+            self._pending_sheet_writes.setdefault(instruction_id, {}).update(updates)
+    
+    def _flush_sheet_updates(self, instruction_id: str) -> bool:
+        """Write the queued tracking sheet updates for one instruction in one batchUpdate"""
+        with self._sheet_writes_lock:
+            updates = self._pending_sheet_writes.pop(instruction_id, None)
+        
+        if not updates:
+            return True
+        return self.update_tracking_sheet(instruction_id, updates)
+    
+    def _wait_for_background(self, future: Optional[concurrent.futures.Future],
+                             timeout: Optional[float] = 30) -> Any:
+        """
+        Wait for a background API call so later writes cannot be overtaken by it
+        
+        With timeout=None the wait is unbounded; use it before a write that
+        must land after the background call.
+        """
+        if future is None:
+            return None
+        
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            print(f"⚠️  Background update still running after {timeout:.0f} seconds")
+            return None
+        except Exception as error:
+            print(f"⚠️  Background update failed: {error}")
+            return None
+    
     def perform_research(self, instruction: Dict) -> Dict:
         """
         Execute research based on instruction using integrated research engine
@@ -295,7 +641,8 @@ class ManusAutomation:
                 instruction_text=instruction['instruction_text'],
                 max_results=instruction['search_parameters'].get('max_results', 10),
                 date_range=instruction['search_parameters'].get('date_range', ''),
-                category=instruction['category']
+                category=instruction['category'],
+                deterministic=DETERMINISTIC_RESEARCH
             )
             
             # Add instruction metadata
@@ -327,105 +674,84 @@ class ManusAutomation:
             raise
     
     def format_research_report(self, results: Dict, instruction: Dict, 
-                              processing_time: float) -> str:
-        """Format the rich, structured research results into a comprehensive report."""
+                              processing_time: float) -> bytes:
+        """
+        Format the rich, structured research results into a comprehensive report.
+        
+        The report is returned UTF-8 encoded, ready for upload.
+        """
+        fragments = self._iter_report_fragments(results, instruction, processing_time)
+        return "".join(fragments).encode('utf-8')
+    
+    def _iter_report_fragments(self, results: Dict, instruction: Dict,
+                               processing_time: float) -> Iterator[str]:
+        """Yield the research report piece by piece"""
         
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         duration = f"{processing_time:.2f} seconds"
         
         # --- Header ---
-        report = f"""# RESEARCH REPORT
-# ===============
-# Generated by: Manus Research Engine
-# Instruction ID: {instruction["instruction_id"]}
-# Category: {instruction["category"]}
-# Generated: {timestamp}
-# Processing Time: {duration}
-# Cases Found: {results["total_cases"]}
-
-## Introduction
-
-This report presents the findings for the research instruction: "{results["research_query"]}". 
-
-The research was conducted using Manus's iterative AI-powered process, which includes strategic query planning, comprehensive web investigation, content validation, and professional synthesis to ensure the quality and relevance of each case.
-
----
-
-## Case Studies
-
-"""
+        yield REPORT_HEADER_TEMPLATE.format(
+            instruction_id=instruction["instruction_id"],
+            category=instruction["category"],
+            timestamp=timestamp,
+            duration=duration,
+            total_cases=results["total_cases"],
+            research_query=results["research_query"]
+        )
         
         # --- Case Studies ---
         if results["cases"]:
             for idx, case in enumerate(results["cases"], 1):
-                report += f"""### {idx}. {case.get("title", "Untitled Case")}
-
-**Date:** {case.get("date", "N/A")}  
-**Source:** {case.get("source", "N/A")}
-
-**Description:**
-
-{case.get("description", "No description available.")}
-
-**Why It Qualifies:**
-
-> {case.get("why_qualifies", "No analysis provided.")}
-
-**Key Points:**
-"""
-                for point in case.get("key_points", []):
-                    report += f"- {point}\n"
-                
-                report += "\n---\n\n"
+                yield REPORT_CASE_TEMPLATE.format(
+                    idx=idx,
+                    title=case.get("title", "Untitled Case"),
+                    date=case.get("date", "N/A"),
+                    source=case.get("source", "N/A"),
+                    description=case.get("description", "No description available."),
+                    why_qualifies=case.get("why_qualifies", "No analysis provided.")
+                )
+                key_points = case.get("key_points", [])
+                yield "".join(f"- {point}\n" for point in key_points)
+                yield "\n---\n\n"
         else:
-            report += "### No Cases Found\n\nThe research process did not identify any cases that met the specified criteria after comprehensive search and validation.\n\n"
+            yield REPORT_NO_CASES
         
         # --- Metadata ---
         metadata = results.get("metadata", {})
-        report += f"""## Research Methodology
-
-{metadata.get("methodology", "Comprehensive iterative research process conducted by Manus AI.")}
-
-**Processing Details:**
-- Processing Time: {processing_time:.1f} seconds
-- Research Timestamp: {metadata.get("research_timestamp", timestamp)}
-- Instruction File: {instruction["filename"]}
-"""
-        
-        return report
+        yield REPORT_FOOTER_TEMPLATE.format(
+            methodology=metadata.get("methodology", "Comprehensive iterative research process conducted by Manus AI."),
+            processing_time=processing_time,
+            research_timestamp=metadata.get("research_timestamp", timestamp),
+            filename=instruction["filename"]
+        )
     
-    def create_google_doc(self, title: str, content: str, folder_id: str) -> Optional[str]:
-        """Create a new Google Doc with the given content"""
+    def create_google_doc(self, title: str, content: bytes,
+                          folder_id: str) -> Optional[str]:
+        """Create a new Google Doc from UTF-8 encoded text"""
         try:
-            # Create the document
+            # Upload the text and let Drive convert it to a Google Doc, so the
+            # document is created with its content in a single request
             doc_metadata = {
                 'name': title,
                 'mimeType': 'application/vnd.google-apps.document',
                 'parents': [folder_id]
             }
             
+            media = MediaIoBaseUpload(
+                io.BytesIO(content),
+                mimetype='text/plain',
+                resumable=False
+            )
+            
             doc = self.drive_service.files().create(
                 body=doc_metadata,
+                media_body=media,
                 fields='id'
             ).execute()
             
             doc_id = doc.get('id')
             
-            # Insert content
-            requests = [
-                {
-                    'insertText': {
-                        'location': {'index': 1},
-                        'text': content
-                    }
-                }
-            ]
-            
-            self.docs_service.documents().batchUpdate(
-                documentId=doc_id,
-                body={'requests': requests}
-            ).execute()
-            
             print(f"✅ Created document: {title} (ID: {doc_id})")
             return doc_id
             
@@ -460,7 +786,9 @@ The research was conducted using Manus's iterative AI-powered process, which inc
         print(f"📄 Processing: {filename}")
         print(f"{'='*60}")
         
-        self.start_time = time.time()
+        start_time = time.time()
+        status_future = None
+        instruction: Optional[Dict] = None
         
         try:
             # Read the instruction file
@@ -480,14 +808,18 @@ The research was conducted using Manus's iterative AI-powered process, which inc
             print(f"📋 Instruction ID: {instruction['instruction_id']}")
             print(f"📂 Category: {instruction['category']}")
             
-            # Update status to Processing
+            # Record the Processing start; it is also written with the final
+            # status, but shown in the sheet right away without holding up research
             print("📝 Updating status to Processing...")
-            self.update_tracking_sheet(
+            processing_update = {
+                'status': 'Processing',
+                'manus_started': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            self._queue_sheet_update(instruction['instruction_id'], processing_update)
+            status_future = self._executor.submit(
+                self.update_tracking_sheet,
                 instruction['instruction_id'],
-                {
-                    'status': 'Processing',
-                    'manus_started': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
+                processing_update
             )
             
             # Perform research
@@ -495,11 +827,13 @@ The research was conducted using Manus's iterative AI-powered process, which inc
             results = self.perform_research(instruction)
             
             # Calculate processing time
-            processing_time = time.time() - self.start_time
+            processing_time = time.time() - start_time
             
             # Format report
             print("📝 Formatting research report...")
-            report_content = self.format_research_report(results, instruction, processing_time)
+            report_content = self.format_research_report(
+                results, instruction, processing_time
+            )
             
             # Generate output filename
             date_str = datetime.now().strftime('%Y%m%d')
@@ -522,7 +856,7 @@ The research was conducted using Manus's iterative AI-powered process, which inc
             
             # Update status to Complete
             print("✅ Updating status to Complete...")
-            self.update_tracking_sheet(
+            self._queue_sheet_update(
                 instruction['instruction_id'],
                 {
                     'status': 'Complete',
@@ -534,13 +868,23 @@ The research was conducted using Manus's iterative AI-powered process, which inc
                 }
             )
             
-            # Move to Processed folder
+            # Move to Processed folder while the final status is written
+            move_future = None
             if not TEST_MODE:
                 print("📦 Moving to Processed folder...")
-                self.move_file(file_id, PENDING_FOLDER_ID, PROCESSED_FOLDER_ID)
+                move_future = self._executor.submit(
+                    self.move_file, file_id, PENDING_FOLDER_ID, PROCESSED_FOLDER_ID
+                )
             else:
                 print("🧪 TEST MODE: Not moving file")
             
+            # The Processing write is a single Sheets call bounded by the HTTP
+            # timeout; it must finish before the final status is written
+            self._wait_for_background(status_future, timeout=None)
+            self._flush_sheet_updates(instruction['instruction_id'])
+            if self._wait_for_background(move_future):
+                self._moved_file_ids.add(file_id)
+            
             print(f"✅ Successfully processed {filename}")
             print(f"⏱️  Processing time: {processing_time:.2f} seconds")
             
@@ -550,43 +894,56 @@ The research was conducted using Manus's iterative AI-powered process, which inc
             print(f"❌ Error processing file: {error}")
             
             # Handle error
-            processing_time = time.time() - self.start_time if self.start_time else 0
+            processing_time = time.time() - start_time
             
             try:
-                # Try to parse instruction to get ID
-                if content:
-                    instruction = self.parse_instruction_file(content, filename)
-                    if instruction['instruction_id']:
-                        # Get current retry count
-                        # (In production, you'd read this from the sheet)
-                        retry_count = 0  # Placeholder
-                        
-                        if retry_count < MAX_RETRIES:
-                            status = 'Pending'
-                            print(f"⚠️  Will retry (attempt {retry_count + 1}/{MAX_RETRIES})")
-                        else:
-                            status = 'Failed'
-                            print(f"❌ Max retries reached, marking as Failed")
-                            # Move to Processed even on failure after max retries
-                            if not TEST_MODE:
-                                self.move_file(file_id, PENDING_FOLDER_ID, PROCESSED_FOLDER_ID)
-                        
-                        self.update_tracking_sheet(
-                            instruction['instruction_id'],
-                            {
-                                'status': status,
-                                'error_message': str(error)[:500],
-                                'retry_count': retry_count + 1,
-                                'last_error_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            }
-                        )
+                move_future = None
+                
+                # Reuse the parsed instruction to get its ID
+                if instruction is not None and instruction['instruction_id']:
+                    # Get current retry count
+                    # (In production, you'd read this from the sheet)
+                    retry_count = 0  # Placeholder
+                    
+                    if retry_count < MAX_RETRIES:
+                        status = 'Pending'
+                        print(f"⚠️  Will retry (attempt {retry_count + 1}/{MAX_RETRIES})")
+                    else:
+                        status = 'Failed'
+                        print(f"❌ Max retries reached, marking as Failed")
+                        # Move to Processed even on failure after max retries,
+                        # while the error status is written
+                        if not TEST_MODE:
+                            move_future = self._executor.submit(
+                                self.move_file, file_id, PENDING_FOLDER_ID, PROCESSED_FOLDER_ID
+                            )
+                    
+                    self._queue_sheet_update(
+                        instruction['instruction_id'],
+                        {
+                            'status': status,
+                            'error_message': str(error)[:500],
+                            'retry_count': retry_count + 1,
+                            'last_error_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        }
+                    )
+                
+                self._wait_for_background(status_future, timeout=None)
+                if instruction is not None and instruction['instruction_id']:
+                    self._flush_sheet_updates(instruction['instruction_id'])
+                if self._wait_for_background(move_future):
+                    self._moved_file_ids.add(file_id)
             except:
                 print("⚠️  Could not update tracking sheet with error")
             
             return False
     
     def process_queue(self):
-        """Main processing loop - process one file from the queue"""
+        """Synchronous wrapper around aprocess_queue"""
+        asyncio.run(self.aprocess_queue())
+    
+    async def aprocess_queue(self):
+        """Main processing loop - process the oldest files in the queue concurrently"""
         print("\n" + "="*60)
         print("🚀 Manus Research Processor v2.0")
         print("="*60)
@@ -595,19 +952,36 @@ The research was conducted using Manus's iterative AI-powered process, which inc
         if TEST_MODE:
             print("🧪 TEST MODE ENABLED")
         
-        # Get pending files
-        pending_files = self.list_pending_files()
+        # Get the oldest pending files (in order, due to orderBy)
+        self._load_queue_state()
+        self._moved_file_ids = set()
+        pending_files = await asyncio.to_thread(self.list_pending_files, MAX_FILES_PER_RUN)
         
         if not pending_files:
             print("✅ No pending instructions found")
             return
         
-        # Process the oldest file (first in the list due to orderBy)
-        oldest_file = pending_files[0]
-        success = self.process_instruction_file(oldest_file)
+        # Each file's Drive, Sheets and research calls block, so files run in
+        # worker threads; the Google clients use one connection per thread
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILES)
+        
+        async def run_item(file_info: Dict) -> bool:
+            async with semaphore:
+                return await asyncio.to_thread(self.process_instruction_file, file_info)
+        
+        outcomes = await asyncio.gather(
+            *[run_item(file_info) for file_info in pending_files],
+            return_exceptions=True
+        )
+        
+        for file_info, outcome in zip(pending_files, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"❌ Unexpected error processing {file_info['name']}: {outcome}")
+        
+        self._advance_watermark_past(pending_files)
         
-        if success:
-            print("\n✅ Queue processing complete")
+        if all(outcome is True for outcome in outcomes):
+            print(f"\n✅ Queue processing complete ({len(pending_files)} file(s))")
         else:
             print("\n⚠️  Queue processing completed with errors")
         
@@ -5,12 +5,108 @@ Delegates research tasks directly to Manus to leverage its full capabilities
 """
 
 import os
-import json
+import copy
 import time
-import re
-from typing import Dict, List, Any
+import asyncio
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
-from openai import OpenAI
+
+import httpx
+import msgspec
+import numpy as np
+from openai import AsyncOpenAI
+
+from incremental_json import IncrementalCaseParser, iter_json_objects
+from llm_cache import LLMCache, PersistentLLMCache
+from rate_limiter import AsyncRateLimiter, count_tokens
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 1536
+# Inputs are packed into requests of at most this many tokens / inputs
+EMBEDDING_REQUEST_TOKENS = 8000
+EMBEDDING_REQUEST_INPUTS = 2048
+
+# Upper bound on concurrently open connections to the OpenAI API
+MAX_CONNECTIONS = 50
+
+RESEARCH_SYSTEM_PROMPT = "You are Manus, an expert research analyst with access to web search and browsing capabilities. You perform thorough, iterative research by searching, reading full articles, validating findings, and synthesizing comprehensive reports."
+RESEARCH_MAX_TOKENS = 16000
+
+# Identical for every request; it leads the prompt so the API's prompt cache
+# can reuse it, and only the instruction and parameters after it vary
+RESEARCH_PROMPT_PREFIX = """You are Manus, an expert research analyst. Perform comprehensive research on the research instruction at the end of this message using your full capabilities.
+
+<methodology>
+1. Search the web for relevant cases using multiple strategic queries
+2. Visit and read the full content of promising articles (not just snippets)
+3. Validate each case against the instruction criteria
+4. If you don't find enough quality cases, reflect on what's missing and perform additional targeted searches
+5. For each validated case, extract detailed information including context, key facts, and analysis
+6. Synthesize your findings into comprehensive case studies
+</methodology>
+
+<output_format>
+Respond with JSON. For each entry in "cases", provide:
+- "title": A clear, descriptive title
+- "date": When the event occurred or was reported
+- "description": A detailed 200-300 word description with full context
+- "why_qualifies": 2-3 sentences explaining how it meets the criteria
+- "key_points": 5-7 specific, detailed bullet points
+- "source": URLs to credible sources (include 2-3 sources per case, comma separated)
+
+In "methodology_note", provide a brief note explaining your research process.
+</output_format>
+"""
+
+# Shared by all engines in the process so the limits hold across them
+_default_limiter = AsyncRateLimiter.from_env()
+
+
+class Case(msgspec.Struct):
+    """One researched case, as emitted by the model"""
+    title: str
+    date: str = "Recent"
+    description: str = ""
+    why_qualifies: str = ""
+    key_points: List[str] = []
+    source: str = ""
+
+
+class CasesResponse(msgspec.Struct, kw_only=True):
+    """Structured output schema for a research run"""
+    # The note comes first so it has already streamed in if generation is cut short
+    methodology_note: str = ""
+    cases: List[Case]
+
+
+def _strict_response_format(struct_type) -> Dict:
+    """
+    JSON-schema response_format for a Struct type
+    
+    Strict structured output needs every property listed as required, no
+    extra properties and no defaults; the defaults only apply when decoding
+    answers from models without structured output support.
+    """
+    schema = msgspec.json.schema(struct_type)
+    definitions = schema['$defs']
+    root = definitions.pop(struct_type.__name__)
+    
+    for definition in [root, *definitions.values()]:
+        for prop in definition['properties'].values():
+            prop.pop('default', None)
+        definition['required'] = list(definition['properties'])
+        definition['additionalProperties'] = False
+    
+    if definitions:
+        root['$defs'] = definitions
+    
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": struct_type.__name__, "strict": True, "schema": root}
+    }
+
+
+RESEARCH_RESPONSE_FORMAT = _strict_response_format(CasesResponse)
 
 
 class ManusDirectResearch:
@@ -19,18 +115,93 @@ class ManusDirectResearch:
     Uses Manus-style prompting to get the same quality as direct interaction
     """
     
-    def __init__(self, api_key: str = None):
-        """Initialize with OpenAI API key"""
+    def __init__(self, api_key: str = None, cache: Optional[LLMCache] = None,
+                 deterministic: bool = False, limiter: Optional[AsyncRateLimiter] = None):
+        """
+        Initialize with OpenAI API key
+        
+        Results are only cached when deterministic is True, which runs the
+        model at temperature 0 so a cached answer stands in for a fresh one.
+        """
         self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key required. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self._aclient = None
+        self._aclient_loop = None
         # Use the same model that Manus uses
         self.model = "gpt-4o"
+        self.deterministic = deterministic
+        self.limiter = limiter or _default_limiter
+        self.cache = (cache or LLMCache()) if deterministic else None
+    
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """Async OpenAI client bound to the running event loop"""
+        # httpx connection pools cannot be shared between event loops, so a
+        # new client is made when the sync wrapper starts a fresh loop
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=MAX_CONNECTIONS)
+                )
+            )
+            self._aclient_loop = loop
+        return self._aclient
     
     def perform_comprehensive_research(self, instruction_text: str, max_results: int = 10,
                                       date_range: str = "", category: str = "") -> Dict:
+        """Synchronous wrapper around aperform_comprehensive_research"""
+        return asyncio.run(self._run_and_close(self.aperform_comprehensive_research(
+            instruction_text=instruction_text,
+            max_results=max_results,
+            date_range=date_range,
+            category=category
+        )))
+    
+    async def _run_and_close(self, coroutine):
+        # The client's connection pool dies with the sync wrapper's event loop
+        try:
+            return await coroutine
+        finally:
+            await self.aclose()
+    
+    async def aclose(self):
+        """Close the async client and its connection pool"""
+        if self._aclient is not None:
+            await self._aclient.close()
+            self._aclient = None
+            self._aclient_loop = None
+    
+    async def aperform_batch(self, instructions: List[str], max_results: int = 10,
+                             date_range: str = "", category: str = "") -> List[Dict]:
+        """Research several instructions concurrently"""
+        # Embed every cache lookup up front instead of one request per instruction
+        embeddings = [None] * len(instructions)
+        if self.cache is not None and instructions:
+            vectors = await self.aembed_many([
+                text
+                for instruction in instructions
+                for text in (instruction, LLMCache.context_string(instruction, category, date_range))
+            ])
+            embeddings = [(vectors[i], vectors[i + 1]) for i in range(0, len(vectors), 2)]
+        
+        return await asyncio.gather(*[
+            self.aperform_comprehensive_research(
+                instruction_text=instruction,
+                max_results=max_results,
+                date_range=date_range,
+                category=category,
+                embeddings=instruction_embeddings
+            )
+            for instruction, instruction_embeddings in zip(instructions, embeddings)
+        ])
+    
+    async def aperform_comprehensive_research(self, instruction_text: str, max_results: int = 10,
+                                              date_range: str = "", category: str = "",
+                                              embeddings: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict:
         """
         Delegate research to Manus-style AI process
         
@@ -39,6 +210,8 @@ class ManusDirectResearch:
             max_results: Target number of cases to find
             date_range: Time period for research
             category: Research category
+            embeddings: Precomputed instruction and context embeddings for
+                the semantic cache lookup
             
         Returns:
             Dictionary with structured research results
@@ -49,30 +222,117 @@ class ManusDirectResearch:
         
         start_time = time.time()
         
+        cache_key = None
+        embedding = context_embedding = None
+        if self.cache is not None:
+            cache_key = LLMCache.make_key(
+                model=self.model,
+                instruction=instruction_text,
+                max_results=max_results,
+                date_range=date_range,
+                category=category
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("♻️  Exact cache hit, reusing previous research")
+                return self._from_cache(cached, instruction_text, 'exact')
+            
+            embedding, context_embedding = embeddings if embeddings is not None else await self.aembed_many([
+                instruction_text,
+                LLMCache.context_string(instruction_text, category, date_range)
+            ])
+            similar = self.cache.get_similar(
+                embedding, category, date_range, context_embedding,
+                model=self.model, max_results=max_results
+            )
+            if similar is not None:
+                cached, similarity = similar
+                print(f"♻️  Semantic cache hit (similarity {similarity:.2f}), reusing previous research")
+                return self._from_cache(cached, instruction_text, 'semantic')
+        
         # Construct a comprehensive research prompt that mimics direct Manus interaction
         research_prompt = self._build_research_prompt(
             instruction_text, max_results, date_range, category
         )
         
-        # Execute the research using Manus-style iterative conversation
-        research_results = self._execute_manus_research(research_prompt)
-        
-        # Parse the results into structured format
-        structured_results = self._parse_research_results(
-            research_results, instruction_text, category, max_results
-        )
+        # Execute the research; the model answers directly in the CasesResponse schema
+        try:
+            parsed = await self._execute_manus_research(research_prompt, max_results)
+            structured_results = self._structure_results(
+                parsed, instruction_text, category, max_results
+            )
+        except ValueError as e:
+            print(f"⚠️  Parsing error: {e}")
+            structured_results = self._empty_results(instruction_text, category, str(e))
         
         elapsed_time = time.time() - start_time
         print(f"✅ Research completed in {elapsed_time:.1f} seconds")
         
+        # Failed parses carry an 'error' in metadata and are not worth keeping
+        if self.cache is not None and 'error' not in structured_results['metadata']:
+            self.cache.set(
+                cache_key,
+                copy.deepcopy(structured_results),
+                embedding,
+                category=category,
+                date_range=date_range,
+                context_embedding=context_embedding,
+                model=self.model,
+                max_results=max_results
+            )
+        
         return structured_results
     
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Synchronous wrapper around aembed_many"""
+        return asyncio.run(self._run_and_close(self.aembed_many(texts)))
+    
+    async def aembed_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with as few requests as the per-request limits allow
+        
+        Returns an (N, EMBEDDING_DIMENSIONS) float32 matrix in input order,
+        ready to score against a query with a single matmul
+        """
+        vectors = []
+        for chunk, tokens in self._embedding_chunks(texts):
+            await self.limiter.acquire(tokens)
+            response = await self.aclient.embeddings.create(model=EMBEDDING_MODEL, input=chunk)
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        
+        if not vectors:
+            return np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        return np.asarray(vectors, dtype=np.float32)
+    
+    @staticmethod
+    def _embedding_chunks(texts: List[str]) -> Iterator[Tuple[List[str], int]]:
+        """Split texts into request-sized chunks, with each chunk's token count"""
+        chunk, chunk_tokens = [], 0
+        for text in texts:
+            tokens = count_tokens(text, EMBEDDING_MODEL)
+            if chunk and (chunk_tokens + tokens > EMBEDDING_REQUEST_TOKENS
+                          or len(chunk) >= EMBEDDING_REQUEST_INPUTS):
+                yield chunk, chunk_tokens
+                chunk, chunk_tokens = [], 0
+            chunk.append(text)
+            chunk_tokens += tokens
+        
+        if chunk:
+            yield chunk, chunk_tokens
+    
+    @staticmethod
+    def _from_cache(cached: Dict, instruction: str, hit_type: str) -> Dict:
+        """Return a cached result as the answer for the current instruction"""
+        results = copy.deepcopy(cached)
+        results['research_query'] = instruction
+        results.setdefault('metadata', {})['cache_hit'] = hit_type
+        return results
+    
     def _build_research_prompt(self, instruction: str, max_results: int, 
                                date_range: str, category: str) -> str:
         """Build a comprehensive research prompt for Manus"""
         
-        prompt = f"""You are Manus, an expert research analyst. Perform comprehensive research on the following instruction using your full capabilities.
-
+        prompt = f"""{RESEARCH_PROMPT_PREFIX}
 <research_instruction>
 {instruction}
 </research_instruction>
@@ -83,143 +343,178 @@ class ManusDirectResearch:
 - Target Cases: {max_results}
 </parameters>
 
-<methodology>
-1. Search the web for relevant cases using multiple strategic queries
-2. Visit and read the full content of promising articles (not just snippets)
-3. Validate each case against the instruction criteria
-4. If you don't find enough quality cases, reflect on what's missing and perform additional targeted searches
-5. For each validated case, extract detailed information including context, key facts, and analysis
-6. Synthesize your findings into comprehensive case studies
-</methodology>
-
-<output_format>
-For each case, provide:
-- **Title**: A clear, descriptive title
-- **Date**: When the event occurred or was reported
-- **Description**: A detailed 200-300 word description with full context
-- **Why It Qualifies**: 2-3 sentences explaining how it meets the criteria
-- **Key Points**: 5-7 specific, detailed bullet points
-- **Sources**: URLs to credible sources (include 2-3 sources per case)
-
-At the end, provide a brief methodology note explaining your research process.
-</output_format>
-
 Please begin your research now. Take your time to be thorough and iterative in your approach."""
 
         return prompt
     
-    def _execute_manus_research(self, prompt: str) -> str:
+    async def _execute_manus_research(self, prompt: str, max_results: int) -> Dict:
         """
         Execute the research using OpenAI API with extended thinking time
-        This simulates the iterative research process
+        This simulates the iterative research process; the answer streams
+        back as structured output matching CasesResponse, and generation is
+        stopped once max_results cases are complete
         """
         print("🔍 Executing Manus-style research process...")
         
         try:
+            # max_tokens counts against the TPM limit as soon as the request is sent
+            await self.limiter.acquire(
+                count_tokens(RESEARCH_SYSTEM_PROMPT + prompt, self.model) + RESEARCH_MAX_TOKENS
+            )
+            
+            scanner = IncrementalCaseParser()
+            completed = False
+            finish_reason = None
+            refusal = []
+            
             # Use a longer max_tokens to allow for comprehensive research
-            response = self.client.chat.completions.create(
+            stream = await self.aclient.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are Manus, an expert research analyst with access to web search and browsing capabilities. You perform thorough, iterative research by searching, reading full articles, validating findings, and synthesizing comprehensive reports."
+                        "content": RESEARCH_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
                         "content": prompt
                     }
                 ],
-                temperature=0.7,
-                max_tokens=16000  # Allow for comprehensive output
+                response_format=RESEARCH_RESPONSE_FORMAT,
+                temperature=0 if self.deterministic else 0.7,
+                max_tokens=RESEARCH_MAX_TOKENS,  # Allow for comprehensive output
+                stream=True
             )
             
-            result = response.choices[0].message.content
+            # Leaving the block closes the connection, which stops generation
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    finish_reason = choice.finish_reason or finish_reason
+                    if getattr(choice.delta, 'refusal', None):
+                        refusal.append(choice.delta.refusal)
+                    delta = choice.delta.content
+                    if not delta:
+                        continue
+                    
+                    for case in scanner.feed(delta):
+                        print(f"   📄 Case {len(scanner.cases)}: {str(case.get('title', 'Untitled'))[:60]}")
+                    
+                    if len(scanner.cases) >= max_results:
+                        break
+                else:
+                    completed = True
+            
+            if refusal:
+                raise ValueError(f"Model refused the research request: {''.join(refusal)}")
+            
+            if not completed:
+                print(f"✓ Research completed early with {len(scanner.cases)} cases")
+                return self._partial_results(scanner)
+            
+            if finish_reason == 'length':
+                print(f"⚠️  Response hit the {RESEARCH_MAX_TOKENS}-token limit after {len(scanner.cases)} complete cases")
+                if not scanner.cases:
+                    raise ValueError("Response was truncated before any case was complete")
+                return self._partial_results(scanner)
+            
             print("✓ Research completed")
-            return result
             
+            try:
+                return msgspec.to_builtins(msgspec.json.decode(scanner.text, type=CasesResponse))
+            except msgspec.DecodeError:
+                pass
+            
+            try:
+                # Models without structured output support answer in plain text
+                return self._extract_json(scanner.text)
+            except ValueError:
+                if not scanner.cases:
+                    raise
+                print(f"⚠️  Could not parse the full response, keeping {len(scanner.cases)} complete cases")
+                return self._partial_results(scanner)
+            
+        except ValueError:
+            raise
         except Exception as e:
             print(f"❌ Research execution error: {e}")
             raise
     
-    def _parse_research_results(self, raw_results: str, instruction: str, 
-                                category: str, max_results: int) -> Dict:
-        """
-        Parse the Manus research output into structured format
-        """
-        print("📊 Parsing research results...")
-        
-        # Use AI to parse the free-form research into structured JSON
-        parsing_prompt = f"""Parse the following research results into a structured JSON format.
-
-Research Results:
-{raw_results}
-
-Convert this into a JSON object with this structure:
-{{
-    "cases": [
-        {{
-            "title": "...",
-            "date": "...",
-            "description": "...",
-            "why_qualifies": "...",
-            "key_points": ["...", "..."],
-            "source": "URL"
-        }}
-    ],
-    "methodology_note": "Brief description of the research process"
-}}
-
-Extract all cases found in the research. Return ONLY valid JSON, no other text."""
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": parsing_prompt}],
-                temperature=0.3
-            )
-            
-            result_text = response.choices[0].message.content
-            
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                parsed = json.loads(json_match.group())
-                
-                return {
-                    'cases': parsed.get('cases', [])[:max_results],
-                    'total_cases': len(parsed.get('cases', [])),
-                    'research_query': instruction,
-                    'category': category,
-                    'metadata': {
-                        'methodology': parsed.get('methodology_note', ''),
-                        'research_timestamp': datetime.now().isoformat()
-                    }
-                }
-            else:
-                raise ValueError("Could not parse JSON from response")
-                
-        except Exception as e:
-            print(f"⚠️  Parsing error: {e}")
-            # Return minimal structure
-            return {
-                'cases': [],
-                'total_cases': 0,
-                'research_query': instruction,
-                'category': category,
-                'metadata': {
-                    'error': str(e),
-                    'raw_results': raw_results[:1000]
-                }
+    @staticmethod
+    def _partial_results(scanner: IncrementalCaseParser) -> Dict:
+        """CasesResponse-shaped result from the cases the scanner completed"""
+        cases = []
+        for case in scanner.cases:
+            try:
+                cases.append(msgspec.to_builtins(msgspec.convert(case, Case)))
+            except msgspec.ValidationError:
+                continue
+        
+        note = scanner.fields.get('methodology_note')
+        return {
+            'cases': cases,
+            'methodology_note': note if isinstance(note, str) else ''
+        }
+    
+    @staticmethod
+    def _extract_json(text: str) -> Dict:
+        """Pull the first CasesResponse-shaped JSON object out of a free-form response"""
+        for candidate in iter_json_objects(text):
+            try:
+                return msgspec.to_builtins(msgspec.json.decode(candidate, type=CasesResponse))
+            except msgspec.DecodeError:
+                continue
+        
+        raise ValueError("Could not parse JSON from response")
+    
+    @staticmethod
+    def _structure_results(parsed: Dict, instruction: str, category: str,
+                           max_results: int) -> Dict:
+        """Shape the model's cases into the research results format"""
+        cases = parsed.get('cases', [])
+        return {
+            'cases': cases[:max_results],
+            'total_cases': len(cases),
+            'research_query': instruction,
+            'category': category,
+            'metadata': {
+                'methodology': parsed.get('methodology_note', ''),
+                'research_timestamp': datetime.now().isoformat()
+            }
+        }
+    
+    @staticmethod
+    def _empty_results(instruction: str, category: str, error: str) -> Dict:
+        """Minimal results structure for a run whose output could not be parsed"""
+        return {
+            'cases': [],
+            'total_cases': 0,
+            'research_query': instruction,
+            'category': category,
+            'metadata': {
+                'error': error
             }
+        }
+
+
+# Shared by wrapper calls so repeated instructions in one process hit the cache;
+# setting LLM_CACHE_DIR keeps it on disk across runs
+_default_cache = (
+    PersistentLLMCache(os.environ['LLM_CACHE_DIR'], dimensions=EMBEDDING_DIMENSIONS)
+    if os.environ.get('LLM_CACHE_DIR') else LLMCache()
+)
 
 
 # Wrapper function for compatibility
 def perform_comprehensive_research(instruction_text: str, max_results: int = 10,
-                                   date_range: str = "", category: str = "") -> Dict:
+                                   date_range: str = "", category: str = "",
+                                   deterministic: bool = False) -> Dict:
     """
     Main entry point - delegates to Manus research engine
     """
-    engine = ManusDirectResearch()
+    engine = ManusDirectResearch(cache=_default_cache, deterministic=deterministic)
     return engine.perform_comprehensive_research(
         instruction_text=instruction_text,
         max_results=max_results,
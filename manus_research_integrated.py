@@ -4,13 +4,66 @@ Manus Research Module - Working Implementation
 Uses web scraping and requests to perform actual research
 """
 
+import os
 import json
 import re
-import requests
-from typing import Dict, List, Any
+import sqlite3
+import asyncio
+import functools
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
-from bs4 import BeautifulSoup
-import time
+
+import aiohttp
+import numpy as np
+import requests
+from datasketch import MinHash, MinHashLSH
+from diskcache import Cache
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
+from urllib3.util.retry import Retry
+
+DDG_HTML_URL = "https://html.duckduckgo.com/html/"
+# Title, URL and snippet links of a result, matched in one walk of its subtree
+RESULT_FIELDS_SELECTOR = 'a.result__a, a.result__url, a.result__snippet'
+RESULT_FIELD_CLASSES = frozenset({'result__a', 'result__url', 'result__snippet'})
+SEARCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Politeness limits for DuckDuckGo: concurrent searches, pause after each one
+MAX_CONCURRENT_SEARCHES = 2
+SEARCH_DELAY_SECONDS = 1
+
+NONALNUM_RE = re.compile(r'[^a-z0-9]+')
+WORD_RE = re.compile(r'[a-z0-9]+')
+SENTENCE_END_RE = re.compile(r'[.!?]+')
+
+# Near-duplicate detection: Jaccard similarity of word sets, via MinHash LSH.
+# Sets rather than n-grams, so reordered titles ("Tim Cook, Apple's CEO" vs
+# "Apple CEO Tim Cook") still match
+DEDUP_THRESHOLD = 0.85
+MINHASH_PERMUTATIONS = 64
+
+# Result pages change slowly, so repeat queries within this window skip the network
+SEARCH_CACHE_TTL_SECONDS = 6 * 60 * 60
+SEARCH_CACHE_DIR = os.environ.get('SEARCH_CACHE_DIR', '/var/cache/manus_search')
+SEARCH_CACHE_FALLBACK_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'manus_search')
+SEARCH_CACHE_SIZE_LIMIT = 1 << 30
+
+# Keep-alive session for synchronous searches, so repeat queries skip the TLS handshake
+_search_session = requests.Session()
+_search_session.headers.update(SEARCH_HEADERS)
+_search_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # A search POST has no side effects, so it is safe to retry
+        allowed_methods=None
+    )
+))
 
 
 def perform_comprehensive_research(instruction_text: str, max_results: int = 10, 
@@ -48,29 +101,22 @@ def perform_comprehensive_research(instruction_text: str, max_results: int = 10,
         }
     
     # Step 1: Generate search queries
-    search_queries = generate_search_queries(instruction_text, category)
+    search_queries = list(generate_search_queries(instruction_text, category))
     print(f"🔍 Generated {len(search_queries)} search queries")
     
     # Step 2: Collect information from multiple sources
     all_findings = []
     
-    # Limit to 2 queries to avoid rate limiting
-    for idx, query in enumerate(search_queries[:2], 1):
-        print(f"\n📡 Search {idx}/{min(2, len(search_queries))}: {query}")
-        
-        try:
-            # Perform web search
-            findings = search_web(query, max_results_per_query=5)
-            all_findings.extend(findings)
-            
-            print(f"   ✓ Found {len(findings)} potential cases")
-            
-            # Small delay to avoid rate limiting
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"   ⚠️  Search error: {e}")
-            continue
+    # Limit to 2 queries to avoid rate limiting; they run concurrently
+    selected_queries = search_queries[:2]
+    for idx, query in enumerate(selected_queries, 1):
+        print(f"\n📡 Search {idx}/{len(selected_queries)}: {query}")
+    
+    search_results = asyncio.run(search_web_many(selected_queries, max_results_per_query=5))
+    
+    for query, findings in zip(selected_queries, search_results):
+        all_findings.extend(findings)
+        print(f"   ✓ {query[:50]}: found {len(findings)} potential cases")
     
     # Step 3: Deduplicate and rank findings
     print(f"\n🔄 Processing {len(all_findings)} findings...")
@@ -83,8 +129,8 @@ def perform_comprehensive_research(instruction_text: str, max_results: int = 10,
     
     # Step 5: Enrich cases
     enriched_cases = []
-    for idx, case in enumerate(top_cases, 1):
-        enriched = enrich_case_details(case)
+    for case, score in top_cases:
+        enriched = enrich_case_details(case, score)
         enriched_cases.append(enriched)
     
     results = {
@@ -107,7 +153,8 @@ def perform_comprehensive_research(instruction_text: str, max_results: int = 10,
     return results
 
 
-def generate_search_queries(instruction: str, category: str = "") -> List[str]:
+@functools.lru_cache(maxsize=1024)
+def generate_search_queries(instruction: str, category: str = "") -> Tuple[str, ...]:
     """Generate multiple search queries"""
     
     queries = []
@@ -121,7 +168,7 @@ def generate_search_queries(instruction: str, category: str = "") -> List[str]:
         queries.append(f"{instruction} examples")
         queries.append(f"recent {instruction}")
     
-    return [q for q in queries if q.strip()]
+    return tuple(q for q in queries if q.strip())
 
 
 def search_web(query: str, max_results_per_query: int = 5) -> List[Dict]:
@@ -132,67 +179,179 @@ def search_web(query: str, max_results_per_query: int = 5) -> List[Dict]:
     if not query.strip():
         return []
     
-    cases = []
+    cache_key = _search_cache_key(query, max_results_per_query)
+    cached = _cached_search(cache_key)
+    if cached is not None:
+        print(f"      ♻️  Using cached search results")
+        return cached
     
     try:
-        # Use DuckDuckGo HTML search (no API key required)
-        url = "https://html.duckduckgo.com/html/"
+        print(f"      🌐 Searching DuckDuckGo...")
+        response = _search_session.post(DDG_HTML_URL, data=_search_form(query), timeout=10)
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        if response.status_code == 200:
+            cases = parse_search_results(response.text, max_results_per_query)
+            _store_search(cache_key, cases)
+            return cases
         
-        data = {
-            'q': query,
-            'b': '',
-            'kl': 'us-en'
-        }
+        print(f"      ⚠️  Search returned status {response.status_code}")
         
-        print(f"      🌐 Searching DuckDuckGo...")
-        response = requests.post(url, headers=headers, data=data, timeout=10)
+    except Exception as e:
+        print(f"      ❌ Search error: {e}")
+    
+    return []
+
+
+async def search_web_many(queries: List[str], max_results_per_query: int = 5) -> List[List[Dict]]:
+    """
+    Run several DuckDuckGo searches concurrently over one connection pool
+    
+    Returns one list of cases per query, in query order
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+    connector = aiohttp.TCPConnector(limit=8)
+    
+    async with aiohttp.ClientSession(connector=connector, headers=SEARCH_HEADERS) as session:
+        return await asyncio.gather(*[
+            _search_web(session, semaphore, query, max_results_per_query)
+            for query in queries
+        ])
+
+
+async def _search_web(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                      query: str, max_results_per_query: int) -> List[Dict]:
+    """Perform one DuckDuckGo search within the politeness limits"""
+    
+    if not query.strip():
+        return []
+    
+    cache_key = _search_cache_key(query, max_results_per_query)
+    cached = _cached_search(cache_key)
+    if cached is not None:
+        print(f"      ♻️  Using cached search results")
+        return cached
+    
+    try:
+        async with semaphore:
+            print(f"      🌐 Searching DuckDuckGo...")
+            async with session.post(DDG_HTML_URL, data=_search_form(query),
+                                    timeout=aiohttp.ClientTimeout(total=10)) as response:
+                status = response.status
+                html = await response.text() if status == 200 else ''
+            
+            # Small delay to avoid rate limiting
+            await asyncio.sleep(SEARCH_DELAY_SECONDS)
         
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
+        if status == 200:
+            cases = parse_search_results(html, max_results_per_query)
+            _store_search(cache_key, cases)
+            return cases
+        
+        print(f"      ⚠️  Search returned status {status}")
+        
+    except Exception as e:
+        print(f"      ❌ Search error: {e}")
+    
+    return []
+
+
+@functools.lru_cache(maxsize=None)
+def _get_search_cache() -> Optional[Cache]:
+    """Open the search result cache on first use, outside the checkout"""
+    for directory in (SEARCH_CACHE_DIR, SEARCH_CACHE_FALLBACK_DIR):
+        try:
+            return Cache(directory, size_limit=SEARCH_CACHE_SIZE_LIMIT)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  Cannot open search cache at {directory}: {e}")
+    
+    # The cache only saves repeat requests; search without it
+    print("⚠️  Searching without a result cache")
+    return None
+
+
+def _cached_search(cache_key: Tuple) -> Optional[List[Dict]]:
+    """Cached results for a search, or None on a miss or cache error"""
+    cache = _get_search_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.get(cache_key)
+    except Exception as e:
+        print(f"      ⚠️  Search cache read failed: {e}")
+        return None
+
+
+def _store_search(cache_key: Tuple, cases: List[Dict]):
+    """Cache the results of a search, skipping the cache if it fails"""
+    cache = _get_search_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(cache_key, cases, expire=SEARCH_CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"      ⚠️  Search cache write failed: {e}")
+
+
+def _search_cache_key(query: str, max_results_per_query: int) -> Tuple:
+    """Cache key for a search, ignoring case and whitespace differences"""
+    return ('ddg', ' '.join(query.lower().split()), max_results_per_query)
+
+
+def _search_form(query: str) -> Dict:
+    """Form fields for a DuckDuckGo HTML search"""
+    return {
+        'q': query,
+        'b': '',
+        'kl': 'us-en'
+    }
+
+
+def parse_search_results(html: str, max_results_per_query: int = 5) -> List[Dict]:
+    """Extract cases from a DuckDuckGo HTML results page"""
+    
+    cases = []
+    tree = LexborHTMLParser(html)
+    
+    # Extract search results
+    results = tree.css('div.result')
+    
+    print(f"      📊 Found {len(results)} results")
+    
+    for idx, result in enumerate(results[:max_results_per_query]):
+        try:
+            fields = {}
+            for node in result.css(RESULT_FIELDS_SELECTOR):
+                for css_class in (node.attributes.get('class') or '').split():
+                    if css_class in RESULT_FIELD_CLASSES:
+                        fields.setdefault(css_class, node)
             
-            # Extract search results
-            results = soup.find_all('div', class_='result')
+            # Extract title
+            title_elem = fields.get('result__a')
+            title = title_elem.text(strip=True) if title_elem else 'Untitled'
             
-            print(f"      📊 Found {len(results)} results")
+            # Extract URL
+            url_elem = fields.get('result__url')
+            source_url = url_elem.attributes.get('href') if url_elem else ''
             
-            for idx, result in enumerate(results[:max_results_per_query]):
-                try:
-                    # Extract title
-                    title_elem = result.find('a', class_='result__a')
-                    title = title_elem.get_text(strip=True) if title_elem else 'Untitled'
-                    
-                    # Extract URL
-                    url_elem = result.find('a', class_='result__url')
-                    source_url = url_elem.get('href') if url_elem else ''
-                    
-                    # Extract snippet/description
-                    snippet_elem = result.find('a', class_='result__snippet')
-                    description = snippet_elem.get_text(strip=True) if snippet_elem else ''
-                    
-                    if title and source_url:
-                        case = {
-                            'title': title,
-                            'description': description,
-                            'source': source_url,
-                            'date': 'Recent',
-                            'key_points': extract_key_points_from_text(description, max_points=3)
-                        }
-                        
-                        cases.append(case)
-                        print(f"      ✓ Extracted: {title[:50]}...")
-                        
-                except Exception as e:
-                    print(f"      ⚠️  Could not parse result {idx}: {e}")
-                    continue
-        else:
-            print(f"      ⚠️  Search returned status {response.status_code}")
+            # Extract snippet/description
+            snippet_elem = fields.get('result__snippet')
+            description = snippet_elem.text(strip=True) if snippet_elem else ''
             
-    except Exception as e:
-        print(f"      ❌ Search error: {e}")
+            if title and source_url:
+                case = {
+                    'title': title,
+                    'description': description,
+                    'source': source_url,
+                    'date': 'Recent',
+                    'key_points': extract_key_points_from_text(description, max_points=3)
+                }
+                
+                cases.append(case)
+                print(f"      ✓ Extracted: {title[:50]}...")
+                
+        except Exception as e:
+            print(f"      ⚠️  Could not parse result {idx}: {e}")
+            continue
     
     return cases
 
@@ -207,65 +366,104 @@ def deduplicate_cases(cases: List[Dict]) -> List[Dict]:
     seen_titles = set()
     seen_urls = set()
     
-    for case in cases:
+    # Reworded copies of the same story slip past the exact checks; LSH buckets
+    # their signatures so each case is only compared with likely matches.
+    # Banding favours recall, and candidates are confirmed on exact Jaccard.
+    lsh = MinHashLSH(threshold=DEDUP_THRESHOLD, num_perm=MINHASH_PERMUTATIONS, weights=(0.2, 0.8))
+    template = MinHash(num_perm=MINHASH_PERMUTATIONS)
+    kept_words = {}
+    
+    for idx, case in enumerate(cases):
         title = case.get('title', '').lower()
         url = case.get('source', '')
         
-        title_key = re.sub(r'[^a-z0-9]+', '', title)
+        title_key = NONALNUM_RE.sub('', title)
+        
+        if not title_key or title_key in seen_titles or url in seen_urls:
+            continue
         
-        if title_key and title_key not in seen_titles and url not in seen_urls:
-            unique_cases.append(case)
-            seen_titles.add(title_key)
-            if url:
-                seen_urls.add(url)
+        words = _word_set(f"{title} {case.get('description', '')}")
+        minhash = template.copy()
+        minhash.update_batch([word.encode('utf-8') for word in words])
+        if any(
+            _jaccard(words, kept_words[key]) >= DEDUP_THRESHOLD
+            for key in lsh.query(minhash)
+        ):
+            continue
+        
+        key = str(idx)
+        lsh.insert(key, minhash)
+        kept_words[key] = words
+        unique_cases.append(case)
+        seen_titles.add(title_key)
+        if url:
+            seen_urls.add(url)
     
     return unique_cases
 
 
-def rank_and_select_cases(cases: List[Dict], max_results: int) -> List[Dict]:
-    """Rank and select top cases"""
+def _word_set(text: str) -> set:
+    """Distinct words of text, for MinHash signatures"""
+    return set(WORD_RE.findall(text.lower()))
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def rank_and_select_cases(cases: List[Dict], max_results: int) -> List[Tuple[Dict, float]]:
+    """Rank and select top cases, returned with their quality scores"""
     
-    if not cases:
+    if not cases or max_results <= 0:
         return []
     
-    scored_cases = []
-    for case in cases:
-        score = calculate_case_quality_score(case)
-        scored_cases.append((score, case))
+    scores = score_cases(cases)
+    
+    if max_results < len(scores):
+        # Partial selection instead of a full sort; ties at the cut-off keep
+        # input order, as a stable sort would
+        top = np.argpartition(-scores, max_results - 1)[:max_results]
+        threshold = scores[top].min()
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:max_results - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(len(scores))
+    
+    order = selected[np.lexsort((selected, -scores[selected]))]
     
-    scored_cases.sort(key=lambda x: x[0], reverse=True)
+    return [(cases[idx], float(scores[idx])) for idx in order]
+
+
+def score_cases(cases: List[Dict]) -> np.ndarray:
+    """Calculate quality scores for a list of cases in one vectorized pass"""
+    
+    count = len(cases)
+    has_title = np.fromiter((bool(c.get('title')) for c in cases), dtype=bool, count=count)
+    desc_len = np.fromiter((len(c.get('description') or '') for c in cases), dtype=np.int32, count=count)
+    has_source = np.fromiter((bool(c.get('source')) for c in cases), dtype=bool, count=count)
+    has_date = np.fromiter((bool(c.get('date')) for c in cases), dtype=bool, count=count)
+    n_points = np.fromiter((len(c.get('key_points') or []) for c in cases), dtype=np.int32, count=count)
+    
+    score = np.zeros(count)
+    score += has_title * 1.0
+    score += (desc_len > 0) * 1.0
+    score += np.minimum(desc_len / 500, 2.0)
+    score += has_source * 1.0
+    score += has_date * 0.5
+    score += np.minimum(n_points * 0.3, 1.5)
     
-    return [case for score, case in scored_cases[:max_results]]
+    return score
 
 
 def calculate_case_quality_score(case: Dict) -> float:
     """Calculate quality score"""
     
-    score = 0.0
-    
-    if case.get('title'):
-        score += 1.0
-    
-    description = case.get('description', '')
-    if description:
-        score += 1.0
-        score += min(len(description) / 500, 2.0)
-    
-    if case.get('source'):
-        score += 1.0
-    
-    if case.get('date'):
-        score += 0.5
-    
-    key_points = case.get('key_points', [])
-    if key_points:
-        score += min(len(key_points) * 0.3, 1.5)
-    
-    return score
+    return float(score_cases([case])[0])
 
 
-def enrich_case_details(case: Dict) -> Dict:
-    """Enrich case with defaults"""
+def enrich_case_details(case: Dict, score: float) -> Dict:
+    """Enrich case with defaults and the quality score it was ranked by"""
     
     enriched = case.copy()
     
@@ -287,7 +485,7 @@ def enrich_case_details(case: Dict) -> Dict:
         else:
             enriched['key_points'] = ['Details from source']
     
-    enriched['quality_score'] = calculate_case_quality_score(enriched)
+    enriched['quality_score'] = score
     
     return enriched
 
@@ -298,15 +496,22 @@ def extract_key_points_from_text(text: str, max_points: int = 5) -> List[str]:
     if not text:
         return []
     
-    sentences = re.split(r'[.!?]+', text)
-    
     key_points = []
-    for sentence in sentences:
-        sentence = sentence.strip()
+    
+    # Walk sentence ends lazily so scanning stops once enough points are found
+    prev = 0
+    for end in SENTENCE_END_RE.finditer(text):
+        sentence = text[prev:end.start()].strip()
+        prev = end.end()
         if 20 < len(sentence) < 200:
             key_points.append(sentence)
             if len(key_points) >= max_points:
-                break
+                return key_points
+    
+    # Trailing text without closing punctuation
+    sentence = text[prev:].strip()
+    if 20 < len(sentence) < 200:
+        key_points.append(sentence)
     
     return key_points
 
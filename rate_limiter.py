@@ -0,0 +1,106 @@
+#!/usr/bin/env python3.11
+"""
+OpenAI Rate Limiter
+Admits requests at the account's steady-state request and token rates
+instead of bursting into 429 responses and backing off
+"""
+
+import os
+import time
+import asyncio
+import threading
+import weakref
+from functools import lru_cache
+
+import tiktoken
+
+# Defaults match the lowest paid tier for gpt-4o; override per account
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+
+
+@lru_cache(maxsize=None)
+def _encoding_for_model(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Count the tokens in text the way the API will"""
+    try:
+        return len(_encoding_for_model(model).encode(text))
+    except Exception:
+        # The encoding could not be loaded (e.g. offline); ~4 characters per token
+        return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Leaky bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.available = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken from the bucket"""
+        self._refill()
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float):
+        self.available -= amount
+
+
+class AsyncRateLimiter:
+    """Request and token buckets guarding calls to the OpenAI API"""
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        # Buckets are shared by every thread; each event loop queues its own waiters
+        self._buckets_lock = threading.Lock()
+        self._loop_locks: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]' = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_env(cls) -> 'AsyncRateLimiter':
+        """Build a limiter from OPENAI_RPM and OPENAI_TPM"""
+        return cls(
+            requests_per_minute=int(os.environ.get('OPENAI_RPM', DEFAULT_REQUESTS_PER_MINUTE)),
+            tokens_per_minute=int(os.environ.get('OPENAI_TPM', DEFAULT_TOKENS_PER_MINUTE))
+        )
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio locks belong to one event loop; sync callers start a new loop
+        # per call, and worker threads each run their own
+        loop = asyncio.get_running_loop()
+        with self._buckets_lock:
+            lock = self._loop_locks.get(loop)
+            if lock is None:
+                lock = self._loop_locks[loop] = asyncio.Lock()
+        return lock
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request using the given number of tokens may be sent"""
+        # A request larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tokens.capacity)
+
+        async with self._get_lock():
+            while True:
+                with self._buckets_lock:
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                    if wait <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        return
+                await asyncio.sleep(wait)
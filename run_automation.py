@@ -32,7 +32,7 @@ def main():
         # Authenticate with Google
         automation.authenticate()
         
-        # Process the queue
+        # Process the queue; files are worked on concurrently
         automation.process_queue()
         
         print("\n✅ Automation cycle complete")
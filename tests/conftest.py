@@ -0,0 +1,15 @@
+import os
+import sys
+
+# The pipeline modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRequest:
+    """Stand-in for a googleapiclient request returning a canned response"""
+
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
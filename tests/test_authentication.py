@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import manus_automation
+from manus_automation import ManusAutomation
+
+
+class FakeCredentials:
+    def __init__(self, valid=True, refresh_token=None, expires_in=timedelta(hours=1)):
+        self.valid = valid
+        self.refresh_token = refresh_token
+        self.expiry = datetime.utcnow() + expires_in
+        self.refreshed = False
+
+    def refresh(self, request):
+        self.refreshed = True
+        self.valid = True
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+
+class ConsentFlowStarted(Exception):
+    pass
+
+
+def start_consent_flow(*args, **kwargs):
+    raise ConsentFlowStarted()
+
+
+@pytest.fixture
+def authenticate(monkeypatch):
+    saved = []
+    monkeypatch.setattr(manus_automation.os.path, 'exists', lambda path: path == 'token.json')
+    monkeypatch.setattr(manus_automation.InstalledAppFlow, 'from_client_secrets_file', start_consent_flow)
+    monkeypatch.setattr(ManusAutomation, '_save_token', staticmethod(saved.append))
+    monkeypatch.setattr(ManusAutomation, '_build_service', lambda self, *args: object())
+
+    def run(creds):
+        monkeypatch.setattr(manus_automation.Credentials, 'from_authorized_user_file',
+                            lambda *args: creds)
+        automation = ManusAutomation()
+        automation.authenticate()
+        return automation, saved
+
+    return run
+
+
+def test_expiring_token_without_refresh_token_is_used_as_is(authenticate):
+    creds = FakeCredentials(expires_in=timedelta(minutes=2))
+
+    automation, saved = authenticate(creds)
+
+    assert automation._credentials is creds
+    assert not creds.refreshed
+    assert saved == []
+
+
+def test_expiring_token_is_refreshed_early(authenticate):
+    creds = FakeCredentials(refresh_token='refresh', expires_in=timedelta(minutes=2))
+
+    automation, saved = authenticate(creds)
+
+    assert creds.refreshed
+    assert saved == [creds]
+
+
+def test_token_with_time_left_is_reused(authenticate):
+    creds = FakeCredentials(refresh_token='refresh')
+
+    automation, saved = authenticate(creds)
+
+    assert not creds.refreshed
+    assert saved == []
+
+
+def test_invalid_token_without_refresh_token_needs_consent(authenticate):
+    with pytest.raises(ConsentFlowStarted):
+        authenticate(FakeCredentials(valid=False))
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from manus_direct_research import ManusDirectResearch
+from rate_limiter import AsyncRateLimiter
+
+CASES = [
+    {'title': f'Case {number}', 'date': '2025-01-0{number}', 'description': 'd',
+     'why_qualifies': 'w', 'key_points': ['k'], 'source': 's'}
+    for number in range(1, 4)
+]
+DOCUMENT = json.dumps({'methodology_note': 'note', 'cases': CASES})
+
+
+class FakeStream:
+    def __init__(self, pieces, finish_reason='stop', refusal=None):
+        self.chunks = [self._chunk(content=piece) for piece in pieces]
+        if refusal:
+            self.chunks.append(self._chunk(refusal=refusal))
+        self.chunks.append(self._chunk(finish_reason=finish_reason))
+
+    @staticmethod
+    def _chunk(content=None, refusal=None, finish_reason=None):
+        delta = SimpleNamespace(content=content, refusal=refusal)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def run_research(stream, max_results=10):
+    research = ManusDirectResearch(
+        api_key='test-key',
+        limiter=AsyncRateLimiter(requests_per_minute=10**6, tokens_per_minute=10**9)
+    )
+
+    async def create(**kwargs):
+        return stream
+
+    async def execute():
+        research._aclient = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+        research._aclient_loop = asyncio.get_running_loop()
+        return await research._execute_manus_research('prompt', max_results)
+
+    return asyncio.run(execute())
+
+
+def pieces(text, size=7):
+    return [text[pos:pos + size] for pos in range(0, len(text), size)]
+
+
+def test_complete_stream_is_decoded():
+    result = run_research(FakeStream(pieces(DOCUMENT)))
+
+    assert result == {'methodology_note': 'note', 'cases': CASES}
+
+
+def test_length_cutoff_keeps_complete_cases():
+    truncated = DOCUMENT[:DOCUMENT.index('"Case 3"')]
+    result = run_research(FakeStream(pieces(truncated), finish_reason='length'))
+
+    assert result['cases'] == CASES[:2]
+    assert result['methodology_note'] == 'note'
+
+
+def test_length_cutoff_without_cases_raises():
+    truncated = DOCUMENT[:DOCUMENT.index('"Case 1"')]
+
+    with pytest.raises(ValueError, match='truncated'):
+        run_research(FakeStream(pieces(truncated), finish_reason='length'))
+
+
+def test_unparseable_ending_keeps_complete_cases():
+    broken = DOCUMENT[:DOCUMENT.index('"Case 3"')]
+    result = run_research(FakeStream(pieces(broken)))
+
+    assert result['cases'] == CASES[:2]
+
+
+def test_refusal_raises():
+    with pytest.raises(ValueError, match='refused'):
+        run_research(FakeStream([], refusal="I can't help with that."))
+
+
+def test_stops_at_max_results():
+    result = run_research(FakeStream(pieces(DOCUMENT)), max_results=2)
+
+    assert result['cases'] == CASES[:2]
+
+
+def test_sync_wrapper_closes_the_client(monkeypatch):
+    research = ManusDirectResearch(api_key='test-key')
+    closed = []
+
+    async def aembed_many(texts):
+        client = research.aclient
+        monkeypatch.setattr(client, 'close', lambda: _record_close(closed))
+        return texts
+
+    monkeypatch.setattr(research, 'aembed_many', aembed_many)
+
+    assert research.embed_many(['a']) == ['a']
+    assert closed == [True]
+    assert research._aclient is None
+
+
+async def _record_close(closed):
+    closed.append(True)
@@ -0,0 +1,72 @@
+import json
+import random
+
+from incremental_json import IncrementalCaseParser, iter_json_objects
+
+CASES = [
+    {'title': 'Brace } and quote " in a title', 'key_points': ['a', 'b]']},
+    {'title': 'Escaped backslash \\', 'key_points': []},
+    {'title': 'Third case {', 'key_points': ['c']},
+]
+DOCUMENT = json.dumps({'methodology_note': 'Searched {news}', 'cases': CASES})
+
+
+def feed_in_pieces(parser, text, rng):
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 8)
+        parser.feed(text[pos:pos + size])
+        pos += size
+
+
+def test_cases_are_returned_as_they_complete():
+    parser = IncrementalCaseParser()
+    first_case_end = DOCUMENT.index(json.dumps(CASES[0])) + len(json.dumps(CASES[0]))
+
+    assert parser.feed(DOCUMENT[:first_case_end - 1]) == []
+    assert parser.feed(DOCUMENT[first_case_end - 1:first_case_end]) == [CASES[0]]
+    assert parser.feed(DOCUMENT[first_case_end:]) == CASES[1:]
+
+
+def test_any_chunking_gives_the_same_result():
+    for seed in range(50):
+        parser = IncrementalCaseParser()
+        feed_in_pieces(parser, DOCUMENT, random.Random(seed))
+
+        assert parser.cases == CASES
+        assert parser.fields == {'methodology_note': 'Searched {news}'}
+        assert parser.text == DOCUMENT
+
+
+def test_truncated_stream_keeps_complete_cases():
+    truncated = DOCUMENT[:DOCUMENT.index(json.dumps(CASES[2])) + 20]
+    parser = IncrementalCaseParser()
+    feed_in_pieces(parser, truncated, random.Random(0))
+
+    assert parser.cases == CASES[:2]
+    assert parser.text == truncated
+
+
+def test_objects_are_found_inside_prose():
+    text = 'Here are the results:\n```json\n{"cases": [{"title": "A"}]}\n```\nLet me know!'
+
+    assert list(iter_json_objects(text)) == ['{"cases": [{"title": "A"}]}']
+
+
+def test_braces_inside_strings_do_not_count():
+    obj = r'{"title": "Uses { and } and an escaped \" quote }", "n": {"x": "\\"}}'
+
+    assert list(iter_json_objects('Result: ' + obj + ' done')) == [obj]
+    assert json.loads(obj)['n'] == {'x': '\\'}
+
+
+def test_each_top_level_object_is_yielded():
+    text = 'first {"a": 1} then {"b": {"c": 2}} end'
+
+    assert list(iter_json_objects(text)) == ['{"a": 1}', '{"b": {"c": 2}}']
+
+
+def test_truncated_object_is_not_yielded():
+    assert list(iter_json_objects('prose {"cases": [{"title": "A"}')) == []
+    assert list(iter_json_objects('{"title": "unterminated }')) == []
+    assert list(iter_json_objects('no json here')) == []
@@ -0,0 +1,88 @@
+import pytest
+
+from manus_automation import ManusAutomation
+
+INSTRUCTION_FILE = """INSTRUCTION_ID: INSTR_042
+CATEGORY: Corporate Drama
+CATEGORY_ID: CD01
+PRIORITY: High
+
+INSTRUCTION:
+Find recent cases of founders ousted by their boards.
+Focus on public companies.
+
+SEARCH_PARAMETERS:
+date_range: Last 6 months
+max_results: 7
+depth: Comprehensive
+
+OUTPUT_CONFIG:
+filename_prefix: DRAMA_
+format: Structured with cases
+"""
+
+
+@pytest.fixture
+def parse():
+    automation = ManusAutomation()
+    return lambda content: automation.parse_instruction_file(content, 'INSTR_042.txt')
+
+
+def test_header_fields_and_instruction_block(parse):
+    assert parse(INSTRUCTION_FILE) == {
+        'instruction_id': 'INSTR_042',
+        'category': 'Corporate Drama',
+        'category_id': 'CD01',
+        'priority': 'High',
+        'instruction_text': 'Find recent cases of founders ousted by their boards.\nFocus on public companies.',
+        'search_parameters': {'max_results': 7, 'date_range': 'Last 6 months'},
+        'output_config': {'filename_prefix': 'DRAMA_'},
+        'filename': 'INSTR_042.txt'
+    }
+
+
+def test_missing_fields_get_defaults(parse):
+    instruction = parse("INSTRUCTION_ID: INSTR_1\n\nINSTRUCTION:\nDo research.\n")
+
+    assert instruction['priority'] == 'Normal'
+    assert instruction['search_parameters'] == {'max_results': 10}
+    assert instruction['output_config'] == {'filename_prefix': 'RESEARCH_'}
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('12', 12),
+    ('5 cases', 5),
+    ('²', 10),
+    ('ten', 10),
+])
+def test_max_results_takes_a_leading_number_or_the_default(parse, value, expected):
+    instruction = parse(f"INSTRUCTION_ID: INSTR_1\nmax_results: {value}\n")
+
+    assert instruction['search_parameters']['max_results'] == expected
+
+
+def test_crlf_and_bom_input(parse):
+    content = '\ufeff' + INSTRUCTION_FILE.replace('\n', '\r\n')
+    instruction = parse(content)
+
+    assert instruction['instruction_id'] == 'INSTR_042'
+    assert instruction['output_config']['filename_prefix'] == 'DRAMA_'
+    assert instruction['search_parameters'] == {'max_results': 7, 'date_range': 'Last 6 months'}
+    assert instruction['instruction_text'].splitlines() == [
+        'Find recent cases of founders ousted by their boards.',
+        'Focus on public companies.'
+    ]
+
+
+def test_value_on_the_next_line(parse):
+    instruction = parse("INSTRUCTION_ID:\nINSTR_7\nCATEGORY: Tech\n")
+
+    assert instruction['instruction_id'] == 'INSTR_7'
+    assert instruction['category'] == 'Tech'
+
+
+def test_field_after_markdown_bold(parse):
+    # Found as with the original per-field search; the closing markers stay in the value
+    instruction = parse("**CATEGORY_ID:** CD01\n")
+
+    assert instruction['category_id'] == '** CD01'
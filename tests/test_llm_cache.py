@@ -0,0 +1,102 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from llm_cache import LLMCache, PersistentLLMCache
+
+EMBEDDING = np.array([1.0, 0.0, 0.0, 0.0])
+CONTEXT_EMBEDDING = np.array([0.0, 1.0, 0.0, 0.0])
+STORED = {
+    'category': 'Tech Launches',
+    'date_range': 'Last 30 days',
+    'model': 'gpt-4.1-mini',
+    'max_results': 5,
+}
+
+
+def cache_with_entry(cache):
+    cache.set('key', {'cases': []}, EMBEDDING,
+              context_embedding=CONTEXT_EMBEDDING, **STORED)
+    return cache
+
+
+def lookup(cache, **overrides):
+    context = dict(STORED, **overrides)
+    return cache.get_similar(
+        EMBEDDING, context['category'], context['date_range'], CONTEXT_EMBEDDING,
+        model=context['model'], max_results=context['max_results']
+    )
+
+
+@pytest.fixture(params=['memory', 'persistent'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return cache_with_entry(LLMCache())
+    return cache_with_entry(PersistentLLMCache(str(tmp_path), dimensions=4))
+
+
+def test_matching_context_is_a_hit(cache):
+    assert lookup(cache, category='  tech   launches ') == ({'cases': []}, pytest.approx(1.0))
+
+
+@pytest.mark.parametrize('overrides', [
+    {'category': 'Healthcare'},
+    {'date_range': 'Last 7 days'},
+    {'model': 'gpt-4.1'},
+    {'max_results': 10},
+])
+def test_different_context_is_a_miss(cache, overrides):
+    assert lookup(cache, **overrides) is None
+
+
+def test_context_embedding_below_threshold_is_a_miss(cache):
+    result = cache.get_similar(
+        EMBEDDING, STORED['category'], STORED['date_range'], np.array([0.0, 0.0, 1.0, 0.0]),
+        model=STORED['model'], max_results=STORED['max_results']
+    )
+    assert result is None
+
+
+def test_persistent_context_survives_reopen(tmp_path):
+    cache_with_entry(PersistentLLMCache(str(tmp_path), dimensions=4))
+    reopened = PersistentLLMCache(str(tmp_path), dimensions=4)
+
+    assert lookup(reopened) is not None
+    assert lookup(reopened, max_results=3) is None
+
+
+def test_persistent_cache_migrates_old_schema(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'cache.sqlite')
+    conn.execute("""
+        CREATE TABLE entries (
+            id INTEGER PRIMARY KEY,
+            key TEXT UNIQUE NOT NULL,
+            category TEXT NOT NULL,
+            date_range TEXT NOT NULL,
+            response_json BLOB NOT NULL,
+            row INTEGER
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+    cache = cache_with_entry(PersistentLLMCache(str(tmp_path), dimensions=4))
+
+    assert lookup(cache) is not None
+
+
+def test_persistent_cache_is_usable_from_worker_threads(tmp_path):
+    cache = PersistentLLMCache(str(tmp_path), dimensions=4)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(
+            lambda number: cache.set(f'key-{number}', {'n': number}, EMBEDDING,
+                                     context_embedding=CONTEXT_EMBEDDING, **STORED),
+            range(8)
+        ))
+        found = list(executor.map(cache.get, [f'key-{number}' for number in range(8)]))
+
+    assert found == [{'n': number} for number in range(8)]
+    assert len(cache._keys) == 8
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+import manus_automation
+from conftest import FakeRequest
+from manus_automation import ManusAutomation, PENDING_FOLDER_ID
+
+
+class FakeFiles:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, **kwargs):
+        self.drive.queries.append(kwargs['q'])
+        return FakeRequest({'files': list(self.drive.folder)})
+
+    def list_next(self, request, response):
+        return None
+
+
+class FakeChanges:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def getStartPageToken(self):
+        return FakeRequest({'startPageToken': '1'})
+
+    def list(self, **kwargs):
+        changes, self.drive.changes_feed = self.drive.changes_feed, []
+        return FakeRequest({'changes': changes, 'newStartPageToken': kwargs['pageToken'] + '1'})
+
+
+class FakeDrive:
+    def __init__(self):
+        self.folder = []
+        self.changes_feed = []
+        self.queries = []
+
+    def files(self):
+        return FakeFiles(self)
+
+    def changes(self):
+        return FakeChanges(self)
+
+
+def pending(file_id, created_time, name=None):
+    return {
+        'id': file_id,
+        'name': name or f'INSTR_{file_id}',
+        'createdTime': created_time,
+        'parents': [PENDING_FOLDER_ID]
+    }
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    path = tmp_path / 'queue_state.json'
+    monkeypatch.setattr(manus_automation, 'QUEUE_STATE_FILE', str(path))
+    return path
+
+
+@pytest.fixture
+def automation(state_file):
+    instance = ManusAutomation()
+    instance.drive_service = FakeDrive()
+    instance._load_queue_state()
+    return instance
+
+
+def test_watermark_stops_before_a_file_left_in_pending(automation, state_file):
+    batch = [
+        pending('a', '2026-01-01T00:00:00.000Z'),
+        pending('b', '2026-01-02T00:00:00.000Z'),
+        pending('c', '2026-01-03T00:00:00.000Z'),
+    ]
+    # 'b' failed and stays in Pending for a retry
+    automation._moved_file_ids = {'a', 'c'}
+
+    automation._advance_watermark_past(batch)
+
+    assert automation._queue_state['watermark'] == '2026-01-01T00:00:00.000Z'
+    assert json.loads(state_file.read_text())['watermark'] == '2026-01-01T00:00:00.000Z'
+
+
+def test_watermark_unchanged_when_oldest_file_failed(automation, state_file):
+    batch = [pending('a', '2026-01-01T00:00:00.000Z'), pending('b', '2026-01-02T00:00:00.000Z')]
+    automation._moved_file_ids = {'b'}
+
+    automation._advance_watermark_past(batch)
+
+    assert 'watermark' not in automation._queue_state
+    assert not state_file.exists()
+
+
+def test_watermark_never_moves_backwards(automation):
+    automation._advance_watermark('2026-01-02T00:00:00.000Z')
+    automation._advance_watermark('2026-01-01T00:00:00.000Z')
+
+    assert automation._queue_state['watermark'] == '2026-01-02T00:00:00.000Z'
+
+
+def test_listing_is_bounded_by_watermark(automation):
+    automation._advance_watermark('2026-01-02T00:00:00.000Z')
+
+    automation.list_pending_files()
+
+    assert automation.drive_service.queries[-1].endswith("and createdTime >= '2026-01-02T00:00:00.000Z'")
+
+
+def test_drained_folder_without_changes_skips_listing(automation):
+    drive = automation.drive_service
+
+    assert automation.list_pending_files() == []  # first run: stores a page token
+    assert automation.list_pending_files() == []  # no changes since: no listing
+
+    assert len(drive.queries) == 1
+
+
+def test_change_older_than_watermark_resets_it(automation):
+    drive = automation.drive_service
+    automation.list_pending_files()
+    automation._advance_watermark('2026-02-01T00:00:00.000Z')
+
+    # A file moved in with an older createdTime than the last processed file
+    old_file = pending('old', '2020-01-01T00:00:00.000Z')
+    drive.folder = [old_file]
+    drive.changes_feed = [{'file': old_file}]
+
+    assert automation.list_pending_files() == [old_file]
+    assert 'watermark' not in automation._queue_state
+    assert 'createdTime' not in drive.queries[-1]
+
+
+def test_changes_are_filtered_in_test_mode(automation, monkeypatch):
+    monkeypatch.setattr(manus_automation, 'TEST_MODE', True)
+    automation._queue_state['page_token'] = '1'
+    automation.drive_service.changes_feed = [
+        {'file': pending('live', '2026-01-01T00:00:00.000Z', name='INSTR_live')},
+        {'file': pending('test', '2026-01-01T00:00:00.000Z', name='TEST_instr')},
+    ]
+
+    changed = automation._pending_changes()
+
+    assert [file['id'] for file in changed] == ['test']
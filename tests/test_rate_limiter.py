@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+import rate_limiter
+from rate_limiter import AsyncRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def test_bucket_refills_at_capacity_per_minute(clock):
+    bucket = TokenBucket(60)
+    bucket.take(60)
+
+    clock.now += 10
+    assert bucket.wait_time(10) == 0.0
+    assert bucket.wait_time(20) == pytest.approx(10.0)
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(60)
+    bucket.take(30)
+
+    clock.now += 3600
+    bucket.wait_time(0)
+    assert bucket.available == 60
+
+
+def test_acquire_waits_for_refill(clock):
+    limiter = AsyncRateLimiter(requests_per_minute=1, tokens_per_minute=600)
+
+    async def two_requests():
+        await limiter.acquire(100)
+        await limiter.acquire(100)
+
+    asyncio.run(two_requests())
+
+    # The second request waits for the request bucket, not the token bucket
+    assert clock.sleeps == [pytest.approx(60.0)]
+
+
+def test_over_capacity_acquire_is_clamped(clock):
+    limiter = AsyncRateLimiter(requests_per_minute=100, tokens_per_minute=600)
+
+    async def oversized_requests():
+        await limiter.acquire(10_000)
+        await limiter.acquire(10_000)
+
+    asyncio.run(oversized_requests())
+
+    # Each request takes at most the whole bucket, so the second waits one full refill
+    assert sum(clock.sleeps) == pytest.approx(60.0)
+    assert limiter.tokens.available == pytest.approx(0.0)
@@ -0,0 +1,117 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import manus_research_integrated
+from manus_research_integrated import _search_web, deduplicate_cases, search_web
+
+DESCRIPTION = (
+    "The company reported revenue growth well above analyst expectations "
+    "driven by strong iPhone sales worldwide"
+)
+
+
+def test_reworded_title_is_a_duplicate():
+    cases = [
+        {'title': 'Apple CEO Tim Cook announces record quarter',
+         'description': DESCRIPTION, 'source': 'https://example.com/a'},
+        {'title': "Tim Cook, Apple's CEO, announces record quarter",
+         'description': DESCRIPTION, 'source': 'https://example.com/b'},
+        {'title': 'Microsoft opens new AI research lab in London',
+         'description': 'The lab will focus on safety research and hire local engineers',
+         'source': 'https://example.com/c'},
+    ]
+
+    unique = deduplicate_cases(cases)
+
+    assert [case['source'] for case in unique] == ['https://example.com/a', 'https://example.com/c']
+
+
+def test_exact_title_and_url_duplicates_are_dropped():
+    cases = [
+        {'title': 'Launch Day!', 'source': 'https://example.com/a'},
+        {'title': 'launch day', 'source': 'https://example.com/b'},
+        {'title': 'Different story', 'source': 'https://example.com/a'},
+        {'title': 'Another story', 'source': ''},
+    ]
+
+    assert [case['title'] for case in deduplicate_cases(cases)] == ['Launch Day!', 'Another story']
+
+
+def test_distinct_stories_on_the_same_topic_are_kept():
+    cases = [
+        {'title': 'Apple reports record quarter', 'description': DESCRIPTION},
+        {'title': 'Apple faces EU fine over App Store rules',
+         'description': 'Regulators said the company restricted developers from steering users to cheaper offers'},
+    ]
+
+    assert len(deduplicate_cases(cases)) == 2
+
+
+class BrokenCache:
+    def get(self, key):
+        raise sqlite3.OperationalError('attempt to write a readonly database')
+
+    def set(self, key, value, expire=None):
+        raise sqlite3.OperationalError('attempt to write a readonly database')
+
+
+class FakeResponse:
+    status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def text(self):
+        return '<html></html>'
+
+
+SEARCH_RESULTS = [{'title': 'Result', 'source': 'https://example.com/r'}]
+
+
+@pytest.fixture
+def broken_cache(monkeypatch):
+    monkeypatch.setattr(manus_research_integrated, '_get_search_cache', BrokenCache)
+    monkeypatch.setattr(manus_research_integrated, 'parse_search_results',
+                        lambda html, max_results: SEARCH_RESULTS)
+
+
+def test_sync_search_survives_cache_errors(broken_cache, monkeypatch):
+    monkeypatch.setattr(manus_research_integrated._search_session, 'post',
+                        lambda *args, **kwargs: SimpleNamespace(status_code=200, text='<html></html>'))
+
+    assert search_web('apple record quarter') == SEARCH_RESULTS
+
+
+def test_async_search_survives_cache_errors(broken_cache, monkeypatch):
+    monkeypatch.setattr(manus_research_integrated, 'SEARCH_DELAY_SECONDS', 0)
+    session = SimpleNamespace(post=lambda *args, **kwargs: FakeResponse())
+
+    async def search():
+        return await _search_web(session, asyncio.Semaphore(1), 'apple record quarter', 5)
+
+    assert asyncio.run(search()) == SEARCH_RESULTS
+
+
+def test_unopenable_cache_falls_back_then_goes_uncached(monkeypatch, tmp_path):
+    opened = []
+
+    def unopenable(directory, size_limit):
+        opened.append(directory)
+        raise sqlite3.OperationalError('unable to open database file')
+
+    monkeypatch.setattr(manus_research_integrated, 'Cache', unopenable)
+    monkeypatch.setattr(manus_research_integrated, 'SEARCH_CACHE_DIR', str(tmp_path / 'primary'))
+    monkeypatch.setattr(manus_research_integrated, 'SEARCH_CACHE_FALLBACK_DIR', str(tmp_path / 'fallback'))
+    manus_research_integrated._get_search_cache.cache_clear()
+    try:
+        assert manus_research_integrated._get_search_cache() is None
+    finally:
+        manus_research_integrated._get_search_cache.cache_clear()
+
+    assert opened == [str(tmp_path / 'primary'), str(tmp_path / 'fallback')]
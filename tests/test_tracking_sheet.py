@@ -0,0 +1,64 @@
+import re
+
+from conftest import FakeRequest
+from manus_automation import ManusAutomation
+
+
+class FakeValues:
+    def __init__(self, column):
+        self.column = column
+        self.ranges = []
+
+    def get(self, spreadsheetId, range):
+        self.ranges.append(range)
+        match = re.search(r'A(\d+):A(\d+)$', range)
+        rows = self.column[int(match.group(1)) - 1:int(match.group(2))] if match else self.column
+        return FakeRequest({'values': [[value] if value else [] for value in rows]})
+
+
+class FakeSheets:
+    def __init__(self, column):
+        self.values_resource = FakeValues(column)
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self.values_resource
+
+
+def automation_with_column(column):
+    automation = ManusAutomation()
+    automation.sheets_service = FakeSheets(column)
+    return automation
+
+
+def test_row_hint_reads_only_the_hinted_cells():
+    # Append-only sheet: the newest instruction sits at the bottom
+    column = ['Instruction_ID'] + [f'INSTR_{number:03d}' for number in range(1, 500)]
+    automation = automation_with_column(column)
+
+    assert automation.find_instruction_row('INSTR_420') == 421
+    assert automation.sheets_service.values_resource.ranges == ['Manus_Queue!A420:A421']
+
+
+def test_duplicated_id_takes_the_hinted_copy():
+    # INSTR_5 was pasted twice; the hint points at the later copy
+    automation = automation_with_column(['Instruction_ID', 'INSTR_1', 'INSTR_5', 'INSTR_3', 'INSTR_5', 'INSTR_6'])
+
+    assert automation.find_instruction_row('INSTR_5') == 5
+
+
+def test_indexed_duplicate_keeps_its_first_row():
+    automation = automation_with_column(['Instruction_ID', 'INSTR_1', 'INSTR_5', 'INSTR_3', 'INSTR_5', 'INSTR_6'])
+    automation._load_row_cache()
+
+    assert automation.find_instruction_row('INSTR_5') == 3
+    assert automation.sheets_service.values_resource.ranges == ['Manus_Queue!A:A']
+
+
+def test_wrong_hint_falls_back_to_full_scan():
+    automation = automation_with_column(['Instruction_ID', 'INSTR_9', 'INSTR_1'])
+
+    assert automation.find_instruction_row('INSTR_1') == 3
+    assert automation.sheets_service.values_resource.ranges == ['Manus_Queue!A1:A2', 'Manus_Queue!A:A']